@@ -0,0 +1,39 @@
+# Single entry point for everything the project can do
+#
+#   python cli.py play [red] [yellow]     play in a window (human, random, short, long, mcts, perfect)
+#   python cli.py tournament long short   play agents against each other without a display
+#   python cli.py bench                   measure the speed of the search
+#   python cli.py solve 4453              solve a position exactly
+#   python cli.py perft --depth 7         check and time move generation against reference counts
+#   python cli.py book build book.bin     build an opening book
+#   python cli.py simulate                play random games in bulk with NumPy
+#
+# Each command only imports the modules it needs, so the engine commands start without
+# loading pygame (or NumPy, or the process pool).
+
+import importlib
+import sys
+
+# Module whose main() runs each command
+COMMANDS = {
+    "play": "gui",
+    "tournament": "core.tournament",
+    "bench": "core.bench",
+    "solve": "core.solver",
+    "perft": "core.perft",
+    "book": "core.book",
+    "simulate": "core.simulate",
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: {sys.argv[0]} {{{','.join(COMMANDS)}}} [options]", file=sys.stderr)
+        print("run a command with --help to see its options", file=sys.stderr)
+        sys.exit(2)
+    importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
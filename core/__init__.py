@@ -0,0 +1,5 @@
+"""
+Shared game engine used by the GUI scripts and the agent harnesses.
+
+Nothing in this package imports pygame, so it can be used on machines without a display.
+"""
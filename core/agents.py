@@ -0,0 +1,510 @@
+# The AI opponents, playing on bitboard positions
+#
+# Every agent implements the Agent interface, so the GUI scripts, the headless
+# tournament runner and the benchmarks can play any agent against any other, and an
+# improvement to the engine reaches all of them at once.
+
+import random
+import time
+
+from core import search, simulate
+from core.book import OpeningBook
+from core.cache import PositionCache, TieredTable
+from core.bitboard import NUM_COLS
+from core.evaluate import Evaluator
+from core.mcts import ParallelTrees, Tree
+from core.ordering import MoveOrderer
+from core.parallel import ParallelSearcher
+from core.solver import Solver, SolverAborted
+from core.stats import SearchStats
+from core.transposition import TranspositionTable
+
+CENTRE_BONUS = 6  # extra score the short term agent gives the centre column
+STOP_WAIT = 0.005  # seconds between two stop requests while a cancelled search winds down
+SOLVE_SHARE = 0.5  # part of its move time the perfect agent gives the solver before searching instead
+
+
+class Agent:
+    """
+    Interface shared by every agent. The GUI scripts, the tournament runner and the
+    benchmarks only call these methods, so any agent can stand in for any other.
+    """
+
+    name = None  # name used on the command line
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed (int): Seed for the agent's own random number generator.
+        """
+        self.rng = random.Random(seed)
+
+    def new_game(self, seed=None):
+        """
+        Function called before every game.
+
+        Args:
+            seed (int): If given, the random number generator is reseeded so the game can be replayed.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to choose a column.
+
+        Args:
+            position (Position): current state of the game board, not changed by the agent.
+            who (int): The player's number (1 or 2).
+            budget (float): Seconds the agent may think for this move, or None for its own limit.
+
+        Returns: column where player should put their piece.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """
+        Function to ask a select_move running on another thread to return as soon as it can.
+        Agents that answer quickly anyway do nothing.
+        """
+
+    def close(self):
+        """
+        Function to release what the agent holds on to (worker processes, files) when it
+        will not be asked for moves any more. Most agents hold nothing.
+        """
+
+
+class RandomAgent(Agent):
+    """
+    Picks a random free column without a strategy.
+    """
+
+    name = "random"
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to choose a column.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+            budget (float): Unused, the choice takes no time.
+
+        Returns: column where player should put their piece.
+        """
+        return self.rng.choice(position.valid_moves())
+
+
+class ShortTermAgent(Agent):
+    """
+    Picks the column with the best score right after the move.
+    """
+
+    name = "short"
+
+    def __init__(self, seed=None, centre_bonus=CENTRE_BONUS):
+        """
+        Args:
+            seed (int): Unused, accepted so that every agent can be built the same way.
+            centre_bonus (int): Extra score for the centre column.
+        """
+        Agent.__init__(self, seed)
+        self.centre_bonus = centre_bonus
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to choose a column.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+            budget (float): Unused, the agent only looks one move ahead.
+
+        Returns: column where player should put their piece.
+        """
+        position = position.copy()
+        evaluator = Evaluator(position)
+        best_score = None
+        best_col = None
+        for col in position.valid_moves():
+            evaluator.play(position, col, who)
+            score = evaluator.score(who)
+            evaluator.undo(position, col, who)
+            if col == NUM_COLS // 2:  # preferring centre
+                score += self.centre_bonus
+            if best_score is None or score > best_score:
+                best_score = score
+                best_col = col
+        return best_col
+
+
+class LongTermAgent(Agent):
+    """
+    Picks a column with iterative deepening minimax under a time budget.
+    """
+
+    name = "long"
+
+    def __init__(self, seed=None, time_limit=1.0, max_depth=None, table_mb=32, workers=1, book=None, cache=None,
+                 stats=False):
+        """
+        Args:
+            seed (int): Unused, accepted so that every agent can be built the same way.
+            time_limit (float): Seconds the agent may think for each move.
+            max_depth (int): Deepest search to run, or None to keep going until time runs out.
+            table_mb (float): Memory cap of the transposition table in megabytes.
+            workers (int): Number of processes searching the root moves in parallel (see core.parallel).
+            book (str): Path of an opening book (see core.book) to play from before searching, or None.
+            cache (str): Path of a position cache file (see core.cache) that keeps search results
+                between games and runs, or None.
+            stats (bool): Collect search statistics over every move in self.stats (see core.stats).
+                Only the one-process search is counted.
+        """
+        Agent.__init__(self, seed)
+        self.book = OpeningBook(book) if book else None
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.workers = workers
+        self.parallel = None  # pool of search processes, started on the first move
+        self.table = TranspositionTable(table_mb)
+        if cache:
+            self.table = TieredTable(PositionCache(cache), self.table)
+        self.orderer = MoveOrderer()
+        self.searcher = None  # search of the move being chosen, so that stop can end it
+        self.stats = SearchStats() if stats else None  # kept over every game, unlike the tables
+
+    def new_game(self, seed=None):
+        """
+        Function called before every game. The search tables are emptied so that every game
+        is played the same way whichever games came before it.
+
+        Args:
+            seed (int): If given, the random number generator is reseeded so the game can be replayed.
+        """
+        Agent.new_game(self, seed)
+        self.table.clear()
+        self.orderer.clear()
+
+    def book_move(self, position, who):
+        """
+        Function to look the position up in the opening book.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+
+        Returns: The book column, or None if there is no book or the position is not in it.
+        """
+        if self.book is None:
+            return None
+        entry = self.book.lookup(position, who)
+        return None if entry is None else entry[0]
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to choose a column.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+            budget (float): Seconds to think for this move, or None for the agent's time limit.
+
+        Returns: column where player should put their piece.
+        """
+        column = self.book_move(position, who)
+        if column is not None:
+            return column
+        time_limit = self.time_limit if budget is None else budget
+        if self.workers > 1:
+            if self.parallel is None:
+                self.parallel = ParallelSearcher(self.workers)
+            (column, value, depth) = self.parallel.iterative_deepening(position, time_limit, self.max_depth,
+                                                                       maximizingPlayer=(who == 2))
+            return column
+        self.searcher = search.Searcher(self.table, time_limit, orderer=self.orderer, stats=self.stats)
+        (column, value, depth) = self.searcher.iterative_deepening(position, self.max_depth, maximizingPlayer=(who == 2))
+        return column
+
+    def stop(self):
+        """
+        Function to ask a select_move running on another thread to return as soon as it can.
+        """
+        searcher = self.searcher
+        if searcher is not None:
+            searcher.stop()
+        if self.parallel is not None:
+            self.parallel.stop()
+
+    def close(self):
+        """
+        Function to shut down the search processes and write the position cache back to disk.
+        """
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+        if isinstance(self.table, TieredTable):
+            self.table.cache.close()
+
+
+class MCTSAgent(Agent):
+    """
+    Picks a column with Monte Carlo Tree Search, keeping the tree from one move to the next.
+    """
+
+    name = "mcts"
+
+    def __init__(self, seed=None, time_limit=1.0, playouts=None, batch=128, workers=1):
+        """
+        Args:
+            seed (int): Seed for the random playouts.
+            time_limit (float): Seconds the agent may think for each move, used when playouts is None.
+            playouts (int): Number of playouts per move, or None to use the time limit.
+            batch (int): Number of playouts run together.
+            workers (int): Number of processes growing trees in parallel (see core.mcts.ParallelTrees).
+                With more than one the tree is not kept from one move to the next.
+        """
+        Agent.__init__(self, seed)
+        self.seed = seed
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.batch = batch
+        self.tree = None
+        self.stopped = False  # set by stop to end the search early
+        simulate.load_numpy()  # now rather than during the first move, which is timed
+        self.parallel = ParallelTrees(workers) if workers > 1 else None
+
+    def new_game(self, seed=None):
+        """
+        Function called before every game. The tree of the last game is dropped.
+
+        Args:
+            seed (int): If given, the playouts are reseeded so the game can be replayed.
+        """
+        Agent.new_game(self, seed)
+        if seed is not None:
+            self.seed = seed
+        self.tree = None
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to choose a column.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+            budget (float): Seconds to think for this move, or None for the agent's time limit.
+
+        Returns: column where player should put their piece.
+        """
+        time_limit = self.time_limit if budget is None else budget
+        self.stopped = False
+        if self.parallel is not None:
+            return self.parallel.best_move(position, who, self.seed, self.playouts,
+                                           None if self.playouts else time_limit, self.batch)
+        if self.tree is None:
+            self.tree = Tree(position, who, self.seed)
+        else:
+            self.tree.advance(position, who)
+        self.tree.run(self.playouts, None if self.playouts else time_limit, self.batch, lambda: self.stopped)
+        return self.tree.best_move()
+
+    def stop(self):
+        """
+        Function to ask a select_move running on another thread to return after its current batch.
+        """
+        self.stopped = True
+        if self.parallel is not None:
+            self.parallel.stop()
+
+    def close(self):
+        """
+        Function to shut down the worker processes.
+        """
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+
+class PerfectAgent(LongTermAgent):
+    """
+    Plays perfectly with the exact solver in core.solver when it can solve the position
+    within its node limit and SOLVE_SHARE of its time, and falls back on the long term
+    agent's search for the rest of the time otherwise (mostly in the first moves of a game).
+    """
+
+    name = "perfect"
+
+    def __init__(self, seed=None, time_limit=1.0, node_limit=100000, **options):
+        """
+        Args:
+            seed (int): Unused, accepted so that every agent can be built the same way.
+            time_limit (float): Seconds per move, shared by the solver and the fallback search.
+            node_limit (int): Number of solver nodes per move before giving up on an exact answer.
+            options: Further options for the fallback search, see LongTermAgent.
+        """
+        LongTermAgent.__init__(self, seed, time_limit, **options)
+        self.solver = Solver(node_limit)
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to choose a column.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+            budget (float): Seconds to think for this move, or None for the agent's time limit.
+
+        Returns: column where player should put their piece.
+        """
+        column = self.book_move(position, who)
+        if column is not None:
+            return column
+        time_limit = self.time_limit if budget is None else budget
+        start_time = time.perf_counter()
+        try:
+            return self.solver.best_move(position, who, None if time_limit is None else time_limit * SOLVE_SHARE)[0]
+        except SolverAborted:
+            if self.solver.stopped:
+                time_limit = 0.0  # stopped from another thread, a depth 1 search answers at once
+            elif time_limit is not None:
+                time_limit = max(0.0, time_limit - (time.perf_counter() - start_time))  # what the solver left
+            return LongTermAgent.select_move(self, position, who, time_limit)
+
+    def stop(self):
+        """
+        Function to ask a select_move running on another thread to return as soon as it can.
+        """
+        self.solver.stop()
+        LongTermAgent.stop(self)
+
+
+class BackgroundAgent:
+    """
+    Runs an agent's select_move on a worker thread, so that a GUI can keep handling events
+    and redrawing while the agent thinks. While the other player is thinking, the agent
+    can ponder: it guesses the other player's move and already searches its reply, which
+    is used straight away if the guess was right.
+
+    Only one call runs at a time, so the agent itself does not need to be thread safe.
+    """
+
+    def __init__(self, agent, who, guess_budget=0.1):
+        """
+        Args:
+            agent (Agent): The agent choosing the moves.
+            who (int): The agent's player number (1 or 2).
+            guess_budget (float): Seconds spent guessing the other player's move when pondering.
+        """
+        self.agent = agent
+        self.who = who
+        self.guess_budget = guess_budget
+        from concurrent.futures import ThreadPoolExecutor  # imported here so that importing the agents stays fast
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None  # the move being chosen, or the pondered reply
+        self.ponder_hash = None  # hash of the position the pondered reply is for
+        self.cancelled = False  # set when a ponder should not start its search
+
+    def ponder(self, position):
+        """
+        Function to start thinking on the other player's turn.
+
+        Args:
+            position (Position): current state of the game board, with the other player to move.
+        """
+        self.cancel()
+        self.cancelled = False
+        self.future = self.executor.submit(self.run_ponder, position.copy())
+
+    def run_ponder(self, position):
+        """
+        Function run on the worker thread to guess the other player's move and search the reply.
+
+        Args:
+            position (Position): Position with the other player to move, owned by the thread.
+
+        Returns: The reply to the guessed move, or None if there is nothing to search.
+        """
+        other = 3 - self.who
+        guess = self.agent.select_move(position, other, self.guess_budget)
+        position.play(guess, other)
+        if self.cancelled or position.has_won(other) or position.is_full():
+            return None
+        self.ponder_hash = position.hash
+        return self.agent.select_move(position, self.who)
+
+    def start(self, position):
+        """
+        Function to start choosing a move, unless the pondered reply is for this position.
+
+        Args:
+            position (Position): current state of the game board, with the agent to move.
+        """
+        if self.future is not None and self.ponder_hash == position.hash:
+            return  # the guess was right, keep the pondered search
+        self.cancel()
+        self.ponder_hash = None
+        self.cancelled = False
+        self.future = self.executor.submit(self.run, position.copy())
+
+    def run(self, position):
+        """
+        Function run on the worker thread.
+
+        Args:
+            position (Position): Position to choose a move in, owned by the thread.
+
+        Returns: The chosen column, or None if the search was cancelled before it started.
+        """
+        if self.cancelled:
+            return None
+        return self.agent.select_move(position, self.who)
+
+    def thinking(self):
+        """
+        Function to check if the agent is still choosing a move.
+
+        Returns: True while a search runs, False otherwise.
+        """
+        return self.future is not None and not self.future.done()
+
+    def result(self):
+        """
+        Function to collect the move chosen after start without waiting.
+
+        Returns: The column, or None if the agent has not finished yet.
+        """
+        if self.future is None or not self.future.done():
+            return None
+        column = self.future.result()
+        self.future = None
+        self.ponder_hash = None
+        return column
+
+    def cancel(self):
+        """
+        Function to stop the running search and wait until the worker thread is idle. Every
+        agent's stop makes select_move return within a few milliseconds. stop is asked again
+        while waiting, in case the thread had not started the search yet when it was first asked.
+        """
+        if self.future is not None:
+            from concurrent.futures import wait
+            self.cancelled = True
+            while not self.future.done():
+                self.agent.stop()
+                wait([self.future], timeout=STOP_WAIT)
+            self.future.result()
+            self.future = None
+        self.ponder_hash = None
+
+    def close(self):
+        """
+        Function to stop the worker thread and close the agent, which must not be used afterwards.
+        """
+        self.cancel()
+        self.executor.shutdown()
+        self.agent.close()
+
+
+# Agents by the name used on the command line
+AGENTS = {agent.name: agent for agent in (RandomAgent, ShortTermAgent, LongTermAgent, MCTSAgent, PerfectAgent)}
@@ -0,0 +1,350 @@
+# Engine benchmarks
+#
+# Times the hot paths of the engine on a fixed set of positions, so that changes can be
+# compared on exactly the same work:
+#
+#   drop_in_column   Position.play and undo of every free column
+#   has_just_won     Position.is_winning_move of every free column
+#   checking_win     Position.has_won of both players (the whole-board check)
+#   score_pos        core.evaluate.score_pos for both players
+#   calculate_score  core.evaluate.calculate_score of every window
+#   best_move        the short term agent's move choice
+#   minimax_d        alpha-beta search to depth d with a fresh table, in nodes per second
+#
+# Every benchmark is run several times and reported as the mean and standard deviation of
+# the rate. Results can be saved as JSON and compared with an earlier run:
+#
+#   python -m core.bench --json before.json
+#   python -m core.bench --compare before.json
+
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+from core.agents import ShortTermAgent
+from core.bitboard import Position
+from core.evaluate import calculate_score, score_pos
+from core.ordering import MoveOrderer
+from core.search import Searcher
+from core.transposition import TranspositionTable
+from core.windows import WINDOW_MASKS
+
+CORPUS_SEED = 2024  # seed of the benchmark positions, fixed so every run searches the same ones
+MIN_TIME = 0.2  # seconds each measurement of a fast operation runs for at least
+REGRESSION = 0.10  # slowdown, as a fraction of the earlier rate, reported as a regression
+
+
+def build_corpus(count=20, seed=CORPUS_SEED):
+    """
+    Function to make the benchmark positions: games of 4 to 20 random moves that nobody has won yet.
+
+    Args:
+        count (int): Number of positions.
+        seed (int): Seed for the random moves.
+
+    Returns: List of (position, who) pairs, who being the player to move.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < count:
+        position, who = Position(), 1
+        for i in range(rng.randint(4, 20)):
+            moves = [col for col in position.valid_moves() if not position.is_winning_move(col, who)]
+            if not moves:
+                break
+            position.play(rng.choice(moves), who)
+            who = 3 - who
+        if not position.is_full() and not position.has_won(1) and not position.has_won(2):
+            corpus.append((position, who))
+    return corpus
+
+
+def bench_drop_in_column(corpus):
+    """
+    Function to play and undo every free column of every position.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+
+    Returns: Number of operations done.
+    """
+    ops = 0
+    for position, who in corpus:
+        for col in position.valid_moves():
+            position.play(col, who)
+            position.undo(col)
+            ops += 1
+    return ops
+
+
+def bench_has_just_won(corpus):
+    """
+    Function to check every free column of every position for a winning move.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+
+    Returns: Number of operations done.
+    """
+    ops = 0
+    for position, who in corpus:
+        for col in position.valid_moves():
+            position.is_winning_move(col, who)
+            ops += 1
+    return ops
+
+
+def bench_checking_win(corpus):
+    """
+    Function to check the whole board of every position for a win of either player.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+
+    Returns: Number of operations done.
+    """
+    for position, who in corpus:
+        position.has_won(1)
+        position.has_won(2)
+    return 2 * len(corpus)
+
+
+def bench_score_pos(corpus):
+    """
+    Function to score every position from both sides.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+
+    Returns: Number of operations done.
+    """
+    for position, who in corpus:
+        score_pos(position, 1)
+        score_pos(position, 2)
+    return 2 * len(corpus)
+
+
+def bench_calculate_score(windows):
+    """
+    Function to score every window of every position.
+
+    Args:
+        windows (list): (mine, theirs) piece counts, see window_counts.
+
+    Returns: Number of operations done.
+    """
+    for mine, theirs in windows:
+        calculate_score(mine, theirs)
+    return len(windows)
+
+
+def window_counts(corpus):
+    """
+    Function to count the pieces of the player to move and the opponent in every window of the corpus.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+
+    Returns: List of (mine, theirs) pairs.
+    """
+    return [((position.bits[who - 1] & mask).bit_count(), (position.bits[2 - who] & mask).bit_count())
+            for position, who in corpus for mask in WINDOW_MASKS]
+
+
+def bench_best_move(corpus):
+    """
+    Function to let the short term agent choose a move in every position.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+
+    Returns: Number of operations done.
+    """
+    agent = ShortTermAgent(0)
+    for position, who in corpus:
+        agent.select_move(position, who)
+    return len(corpus)
+
+
+def bench_search(corpus, depth):
+    """
+    Function to search every position of the corpus with a fresh table and move orderer.
+    Only the searches are timed, not making the tables.
+
+    Args:
+        corpus (list): (position, who) pairs from build_corpus.
+        depth (int): Depth of every search.
+
+    Returns: A tuple (nodes, seconds) over the whole corpus.
+    """
+    nodes = 0
+    seconds = 0.0
+    for position, who in corpus:
+        searcher = Searcher(TranspositionTable(), orderer=MoveOrderer())
+        position = position.copy()
+        start_time = time.perf_counter()
+        searcher.minimax(position, depth, -math.inf, math.inf, who == 2)
+        seconds += time.perf_counter() - start_time
+        nodes += searcher.nodes
+    return nodes, seconds
+
+
+def measure(run, repeats):
+    """
+    Function to measure the rate of a benchmark. Each sample repeats the benchmark until it
+    has run for MIN_TIME seconds, so that fast operations are not lost in timer noise.
+
+    Args:
+        run (callable): Does the work once and returns a tuple (operations, seconds timed).
+        repeats (int): Number of samples.
+
+    Returns: List of rates (operations per second), one per sample.
+    """
+    rates = []
+    for i in range(repeats):
+        ops, elapsed = 0, 0.0
+        while elapsed < MIN_TIME:
+            done, seconds = run()
+            ops += done
+            elapsed += seconds
+        rates.append(ops / elapsed)
+    return rates
+
+
+def timed(run):
+    """
+    Function to time a benchmark that only counts its operations.
+
+    Args:
+        run (callable): Does the work once and returns the number of operations.
+
+    Returns: A function returning (operations, seconds), as measure expects.
+    """
+    def timed_run():
+        start_time = time.perf_counter()
+        ops = run()
+        return ops, time.perf_counter() - start_time
+    return timed_run
+
+
+def summarise(rates, unit):
+    """
+    Function to sum up the samples of one benchmark.
+
+    Args:
+        rates (list): Rates measured by measure.
+        unit (str): "ops/s" or "nodes/s".
+
+    Returns: Dict with the unit, mean, standard deviation, min, max and the samples.
+    """
+    return {"unit": unit, "mean": statistics.mean(rates), "stdev": statistics.stdev(rates) if len(rates) > 1 else 0.0,
+            "min": min(rates), "max": max(rates), "samples": rates}
+
+
+def run_suite(positions=20, max_depth=7, repeats=5, only=None):
+    """
+    Function to run every benchmark.
+
+    Args:
+        positions (int): Number of positions in the corpus.
+        max_depth (int): Deepest minimax benchmark (minimax_1 up to minimax_max_depth).
+        repeats (int): Number of samples of each benchmark.
+        only (list): Names of the benchmarks to run, or None for all of them.
+
+    Returns: Dict from benchmark name to its summary, in the order they ran.
+    """
+    corpus = build_corpus(positions)
+    windows = window_counts(corpus)
+    benchmarks = {
+        "drop_in_column": ("ops/s", lambda: bench_drop_in_column(corpus)),
+        "has_just_won": ("ops/s", lambda: bench_has_just_won(corpus)),
+        "checking_win": ("ops/s", lambda: bench_checking_win(corpus)),
+        "score_pos": ("ops/s", lambda: bench_score_pos(corpus)),
+        "calculate_score": ("ops/s", lambda: bench_calculate_score(windows)),
+        "best_move": ("ops/s", lambda: bench_best_move(corpus)),
+    }
+    results = {}
+    for name, (unit, run) in benchmarks.items():
+        if only is None or name in only:
+            results[name] = summarise(measure(timed(run), repeats), unit)
+    for depth in range(1, max_depth + 1):
+        name = f"minimax_{depth}"
+        if only is None or name in only:
+            results[name] = summarise(measure(lambda: bench_search(corpus, depth), repeats), "nodes/s")
+            # the same in every run, a change means the search itself changed
+            results[name]["nodes"] = bench_search(corpus, depth)[0]
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION):
+    """
+    Function to compare a run with an earlier one.
+
+    Args:
+        results (dict): Benchmarks of this run, see run_suite.
+        baseline (dict): Benchmarks of the earlier run.
+        threshold (float): Slowdown, as a fraction of the earlier rate, that counts as a regression.
+
+    Returns: List of (name, ratio, regressed) for the benchmarks found in both runs, ratio being
+        the new mean rate over the old one. A benchmark regressed if it got more than threshold
+        slower by more than the noise (two standard deviations of either run).
+    """
+    rows = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        ratio = result["mean"] / old["mean"]
+        noise = 2 * max(result["stdev"], old["stdev"])
+        regressed = ratio < 1 - threshold and old["mean"] - result["mean"] > noise
+        rows.append((name, ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+
+    parser = argparse.ArgumentParser(description="Measure the speed of the Connect 4 engine.")
+    parser.add_argument("--positions", type=int, default=20, help="number of positions in the corpus")
+    parser.add_argument("--max-depth", type=int, default=7, help="deepest minimax benchmark")
+    parser.add_argument("--repeats", type=int, default=5, help="samples of each benchmark")
+    parser.add_argument("--only", nargs="+", default=None, help="names of the benchmarks to run")
+    parser.add_argument("--json", default=None, help="save the results to this file")
+    parser.add_argument("--compare", default=None, help="compare with the results saved in this file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION,
+                        help="slowdown (fraction of the earlier rate) reported as a regression, exits with status 1")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.positions, args.max_depth, args.repeats, args.only)
+    for name, result in results.items():
+        spread = 100 * result["stdev"] / result["mean"]
+        print(f"{name:16} {result['mean']:14,.0f} {result['unit']:8} +- {spread:4.1f}%")
+
+    if args.json:
+        report = {"python": sys.version.split()[0], "platform": platform.platform(), "time": time.time(),
+                  "positions": args.positions, "corpus_seed": CORPUS_SEED, "repeats": args.repeats,
+                  "benchmarks": results}
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("positions") != args.positions:
+            print(f"warning: {args.compare} used {baseline.get('positions')} positions, this run {args.positions}")
+        rows = compare(results, baseline["benchmarks"], args.threshold)
+        print(f"\ncompared with {args.compare}:")
+        for name, ratio, regressed in rows:
+            old_nodes, new_nodes = baseline["benchmarks"][name].get("nodes"), results[name].get("nodes")
+            searched = f"  (searched {old_nodes} -> {new_nodes} nodes)" if old_nodes != new_nodes else ""
+            print(f"{name:16} {ratio:6.2f}x{'  REGRESSION' if regressed else ''}{searched}")
+        if any(regressed for name, ratio, regressed in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# Bitboard representation of a Connect 4 position
+#
+# Every column takes NUM_ROWS + 1 bits (one spare bit on top so that pieces of
+# neighbouring columns never line up by accident when shifting):
+#
+#   .  .  .  .  .  .  .
+#   5 12 19 26 33 40 47
+#   4 11 18 25 32 39 46
+#   3 10 17 24 31 38 45
+#   2  9 16 23 30 37 44
+#   1  8 15 22 29 36 43
+#   0  7 14 21 28 35 42
+#
+# Each player gets one integer where bit i is set if that player owns cell i.
+# Alongside the bitmaps every position keeps a Zobrist hash, which is updated with
+# one XOR per move so that it can be used as a transposition table key.
+#
+# The board is left-right symmetric, so a position and its mirror image have the same
+# score and mirrored best moves. Every position also keeps the hash of its mirror image,
+# and tables are keyed by the smaller of the two (the canonical key) so that both
+# orientations share one entry. A move stored for the mirror image is translated back
+# with mirror_move.
+
+import random
+
+# Constants for the game board
+NUM_COLS = 7  # Number of columns in the game board
+NUM_ROWS = 6  # Number of rows in the game board
+COL_BITS = NUM_ROWS + 1  # Number of bits used by one column (including the spare bit)
+
+# Shifts that move a cell one step along each orientation
+VERTICAL = 1
+HORIZONTAL = COL_BITS
+DIAGONAL_UP = COL_BITS + 1
+DIAGONAL_DOWN = COL_BITS - 1
+
+# Random 64 bit keys for every (player, cell) pair. The seed is fixed so that hashes are
+# the same in every process and can be stored on disk.
+_rng = random.Random(20240229)
+ZOBRIST = [[_rng.getrandbits(64) for i in range(NUM_COLS * COL_BITS)] for who in range(2)]
+# Keys of the mirrored cell, so MIRROR_ZOBRIST[who][i] hashes the mirror image of cell i
+MIRROR_ZOBRIST = [[keys[(NUM_COLS - 1 - i // COL_BITS) * COL_BITS + i % COL_BITS] for i in range(NUM_COLS * COL_BITS)]
+                  for keys in ZOBRIST]
+
+# Bitmaps of every column, used to mirror bitmaps
+COLUMN_BITS = [((1 << COL_BITS) - 1) << (coli * COL_BITS) for coli in range(NUM_COLS)]
+# (left column bitmap, right column bitmap, shift) for every pair of columns that swap places
+MIRROR_PAIRS = [(COLUMN_BITS[coli], COLUMN_BITS[NUM_COLS - 1 - coli], (NUM_COLS - 1 - 2 * coli) * COL_BITS)
+                for coli in range(NUM_COLS // 2)]
+# Bitmap of the middle column, which stays where it is (0 for an even number of columns)
+MIRROR_MIDDLE = COLUMN_BITS[NUM_COLS // 2] if NUM_COLS % 2 else 0
+
+
+def bit_index(rowi, coli):
+    """
+    Function to find the bit used for a cell.
+
+    Args:
+        rowi (int): The row index (0 is the top row).
+        coli (int): The column index.
+
+    Returns: Index of the bit for that cell.
+    """
+    return coli * COL_BITS + NUM_ROWS - 1 - rowi
+
+
+def four_in_a_row(bits):
+    """
+    Function to check if a bitmap contains four set bits in a line.
+
+    Args:
+        bits (int): bitmap of the cells owned by one player.
+
+    Returns: True if there are 4 pieces in a line, False otherwise.
+    """
+    for shift in (VERTICAL, HORIZONTAL, DIAGONAL_UP, DIAGONAL_DOWN):
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+def mirror_move(coli):
+    """
+    Function to find the column a move is played in on the mirrored board.
+
+    Args:
+        coli (int): The column index, or None.
+
+    Returns: The mirrored column index, or None.
+    """
+    return None if coli is None else NUM_COLS - 1 - coli
+
+
+def mirror_bits(bits):
+    """
+    Function to mirror a bitmap left to right.
+
+    Works for any value whose columns stay inside their own COL_BITS bits, such as the
+    current + mask keys used by the solver and the opening book.
+
+    Args:
+        bits (int): bitmap to mirror.
+
+    Returns: The mirrored bitmap.
+    """
+    mirrored = bits & MIRROR_MIDDLE
+    for left, right, shift in MIRROR_PAIRS:
+        mirrored |= (bits & left) << shift | (bits & right) >> shift
+    return mirrored
+
+
+def canonical_key(key):
+    """
+    Function to pick the canonical one of a bitmap key and its mirror image.
+
+    Args:
+        key (int): Key built from bitmaps, see mirror_bits.
+
+    Returns: A tuple (canonical key, True if it is the mirrored key).
+    """
+    mirrored = mirror_bits(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+class Position:
+    """
+    A Connect 4 position stored as two bitmaps and a height table.
+
+    Rows are numbered like the list boards used by the scripts, so row 0 is the top
+    row and row NUM_ROWS - 1 is the bottom row.
+    """
+
+    def __init__(self):
+        self.bits = [0, 0]  # bitmaps of player 1 and player 2
+        self.heights = [0] * NUM_COLS  # number of pieces in each column
+        self.count = 0  # number of pieces on the board
+        self.hash = 0  # Zobrist hash of the pieces on the board
+        self.mirror_hash = 0  # Zobrist hash of the mirror image of the board
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Function to build a position from a 6x7 list board.
+
+        Args:
+            board (2D list): list containing current state of the game board.
+
+        Returns: The equivalent position.
+        """
+        position = cls()
+        for coli in range(NUM_COLS):
+            for rowi in range(NUM_ROWS - 1, -1, -1):
+                if board[rowi][coli] == 0:
+                    break
+                position.play(coli, board[rowi][coli])
+        return position
+
+    def to_board(self):
+        """
+        Function to convert the position back into a 6x7 list board.
+
+        Returns: 2D list with 0 for empty cells and 1 or 2 for the player's pieces.
+        """
+        return [[self.cell(r, c) for c in range(NUM_COLS)] for r in range(NUM_ROWS)]
+
+    def copy(self):
+        """
+        Function to make an independent copy of the position.
+
+        Returns: A new position with the same pieces.
+        """
+        position = Position()
+        position.bits = self.bits[:]
+        position.heights = self.heights[:]
+        position.count = self.count
+        position.hash = self.hash
+        position.mirror_hash = self.mirror_hash
+        return position
+
+    def canonical_hash(self):
+        """
+        Function to pick the canonical one of the position's hash and its mirror image's hash.
+
+        Returns: A tuple (canonical hash, True if it is the mirror image's hash).
+        """
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
+
+    def cell(self, rowi, coli):
+        """
+        Function to look up who owns a cell.
+
+        Args:
+            rowi (int): The row index (0 is the top row).
+            coli (int): The column index.
+
+        Returns: 0 if the cell is empty, otherwise the player's number (1 or 2).
+        """
+        bit = 1 << bit_index(rowi, coli)
+        if self.bits[0] & bit:
+            return 1
+        if self.bits[1] & bit:
+            return 2
+        return 0
+
+    def can_play(self, coli):
+        """
+        Function to check if a column is free for a move.
+
+        Args:
+            coli (int): The column index to check.
+
+        Returns: True if the column is free, False otherwise.
+        """
+        return self.heights[coli] < NUM_ROWS
+
+    def valid_moves(self):
+        """
+        Function to list the columns that are free for a move.
+
+        Returns: List of available columns, from left to right.
+        """
+        return [c for c in range(NUM_COLS) if self.heights[c] < NUM_ROWS]
+
+    def is_full(self):
+        """
+        Function to check if every cell of the board is taken.
+
+        Returns: True if the board is full, False otherwise.
+        """
+        return self.count == NUM_ROWS * NUM_COLS
+
+    def play(self, coli, who):
+        """
+        Function to make a move by dropping a piece into a column.
+
+        Args:
+            coli (int): The column index to drop the piece into.
+            who (int): The player making the move (1 or 2).
+
+        Returns: The row index where the piece was dropped.
+        """
+        height = self.heights[coli]
+        index = coli * COL_BITS + height
+        self.bits[who - 1] |= 1 << index
+        self.heights[coli] = height + 1
+        self.count += 1
+        self.hash ^= ZOBRIST[who - 1][index]
+        self.mirror_hash ^= MIRROR_ZOBRIST[who - 1][index]
+        return NUM_ROWS - 1 - height
+
+    def is_winning_move(self, coli, who):
+        """
+        Function to check if dropping a piece into a column would win, without making the move.
+
+        Args:
+            coli (int): The column index to drop the piece into.
+            who (int): The player making the move (1 or 2).
+
+        Returns: True if the move makes 4 in a line, False otherwise.
+        """
+        return four_in_a_row(self.bits[who - 1] | 1 << (coli * COL_BITS + self.heights[coli]))
+
+    def has_won(self, who):
+        """
+        Function to check if a player has 4 pieces in a line anywhere on the board.
+
+        Args:
+            who (int): The player's number (1 or 2).
+
+        Returns: True if the player has won, False otherwise.
+        """
+        return four_in_a_row(self.bits[who - 1])
+
+    def undo(self, coli):
+        """
+        Function to undo a move by removing the top piece of a column.
+
+        Args:
+            coli (int): The column index to take the piece from.
+        """
+        height = self.heights[coli] - 1
+        index = coli * COL_BITS + height
+        bit = 1 << index
+        if self.bits[0] & bit:
+            self.bits[0] ^= bit
+            self.hash ^= ZOBRIST[0][index]
+            self.mirror_hash ^= MIRROR_ZOBRIST[0][index]
+        else:
+            self.bits[1] ^= bit
+            self.hash ^= ZOBRIST[1][index]
+            self.mirror_hash ^= MIRROR_ZOBRIST[1][index]
+        self.heights[coli] = height
+        self.count -= 1
@@ -0,0 +1,227 @@
+# Opening book
+#
+# The best move for every position up to a given number of pieces is worked out offline
+# and written to a binary file of fixed size records sorted by key:
+#
+#   header   8 bytes magic, 4 bytes record count
+#   record   8 bytes key, 2 bytes score, 1 byte column, 1 byte flags
+#
+# The key of a position is current + mask (the pieces of the player to move plus every
+# piece on the board), which is different for every position, so the book does not
+# depend on which colour moved first. Only the canonical one of a position and its
+# mirror image is stored, and the column is mirrored back when the other one is looked
+# up. Agents open the file with mmap and binary search it, so loading is instant and
+# worker processes share the same pages.
+#
+# Build a book with
+#
+#   python -m core.book build book.bin --plies 4
+
+import mmap
+import struct
+import time
+
+from core import search
+from core.bitboard import Position, canonical_key, mirror_move
+from core.ordering import MoveOrderer
+from core.solver import Solver, SolverAborted
+from core.transposition import TranspositionTable
+
+MAGIC = b"C4BOOK02"
+HEADER = struct.Struct("<8sI")
+RECORD = struct.Struct("<Qhbb")  # key, score, column, flags
+EXACT_FLAG = 1  # the score comes from the solver, otherwise from the heuristic search
+
+
+def position_key(position, who):
+    """
+    Function to work out the book key of a position.
+
+    Args:
+        position (Position): current state of the game board.
+        who (int): The player to move (1 or 2).
+
+    Returns: A tuple (canonical key, True if it is the key of the mirror image).
+    """
+    return canonical_key(position.bits[who - 1] + (position.bits[0] | position.bits[1]))
+
+
+class OpeningBook:
+    """
+    Read-only view of a book file through mmap.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of a file written by write_book.
+        """
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+
+    def close(self):
+        """
+        Function to release the mapping.
+        """
+        self.data.close()
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, position, who):
+        """
+        Function to find a position in the book with binary search.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player to move (1 or 2).
+
+        Returns: A tuple (column, score, exact) for the player to move, or None if the position is not in the book.
+        """
+        key, mirrored = position_key(position, who)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, score, column, flags = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return mirror_move(column) if mirrored else column, score, bool(flags & EXACT_FLAG)
+        return None
+
+
+def write_book(path, entries):
+    """
+    Function to write a book file.
+
+    Args:
+        path (str): Path of the file to write.
+        entries (dict): Key to (column, score, exact) for every position in the book.
+    """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        for key in sorted(entries):
+            column, score, exact = entries[key]
+            score = max(-32768, min(32767, score))
+            f.write(RECORD.pack(key, score, column, EXACT_FLAG if exact else 0))
+
+
+def book_positions(plies):
+    """
+    Function to list every position reachable from the empty board in up to plies moves.
+
+    Args:
+        plies (int): Maximum number of pieces on the board.
+
+    Returns: List of (position, who) pairs for positions where the game is still going, one per
+        canonical key (so one of a position and its mirror image).
+    """
+    found = {}
+    frontier = [(Position(), 1)]
+    for ply in range(plies + 1):
+        deeper = []
+        for position, who in frontier:
+            key = position_key(position, who)[0]
+            if key in found:
+                continue
+            found[key] = (position, who)
+            if ply == plies:
+                continue
+            for col in position.valid_moves():
+                if not position.is_winning_move(col, who):
+                    child = position.copy()
+                    child.play(col, who)
+                    deeper.append((child, 3 - who))
+        frontier = deeper
+    return list(found.values())
+
+
+def analyse_position(job):
+    """
+    Function to find the book move of one position. Runs inside a worker process.
+
+    Args:
+        job (tuple): (position, who, solver node limit, seconds for the fallback search).
+
+    Returns: A tuple (canonical key, (column, score, exact)), with the column for the canonical orientation.
+    """
+    position, who, node_limit, time_limit = job
+    key, mirrored = position_key(position, who)
+    try:
+        column, score = Solver(node_limit).best_move(position, who)
+        exact = True
+    except SolverAborted:
+        column, value, depth = search.iterative_deepening(position, time_limit, table=TranspositionTable(),
+                                                          orderer=MoveOrderer(), maximizingPlayer=(who == 2))
+        score, exact = int(value if who == 2 else -value), False
+    return key, (mirror_move(column) if mirrored else column, score, exact)
+
+
+def build_book(plies, node_limit=200000, time_limit=1.0, workers=1, progress=None):
+    """
+    Function to work out the book moves of every position up to plies moves.
+
+    Args:
+        plies (int): Maximum number of pieces on the board.
+        node_limit (int): Solver nodes per position before falling back on the heuristic search.
+        time_limit (float): Seconds of heuristic search per position when the solver gives up.
+        workers (int): Number of worker processes.
+        progress (callable): Called with (done, total) after each position, or None.
+
+    Returns: Dict from key to (column, score, exact), ready for write_book.
+    """
+    jobs = [(position, who, node_limit, time_limit) for position, who in book_positions(plies)]
+    entries = {}
+    from concurrent.futures import ProcessPoolExecutor  # only needed when building a book
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for key, entry in pool.map(analyse_position, jobs, chunksize=4):
+            entries[key] = entry
+            if progress is not None:
+                progress(len(entries), len(jobs))
+    return entries
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+
+    parser = argparse.ArgumentParser(description="Build or query a Connect 4 opening book.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="work out the book moves and write the book file")
+    build.add_argument("path")
+    build.add_argument("--plies", type=int, default=4, help="book every position with up to this many pieces")
+    build.add_argument("--nodes", type=int, default=200000, help="solver nodes per position")
+    build.add_argument("--time", type=float, default=1.0, help="seconds of fallback search per position")
+    build.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    probe = commands.add_parser("probe", help="look up the position after a sequence of moves")
+    probe.add_argument("path")
+    probe.add_argument("moves", nargs="?", default="", help="columns played so far, 1-7, e.g. 4435")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start_time = time.perf_counter()
+        entries = build_book(args.plies, args.nodes, args.time, args.workers,
+                             lambda done, total: print(f"\r{done}/{total} positions", end="", flush=True))
+        write_book(args.path, entries)
+        exact = sum(1 for entry in entries.values() if entry[2])
+        print(f"\nwrote {len(entries)} positions ({exact} solved exactly) in {time.perf_counter() - start_time:.1f} s")
+    else:
+        position, who = Position(), 1
+        for move in args.moves:
+            position.play(int(move) - 1, who)
+            who = 3 - who
+        book = OpeningBook(args.path)
+        entry = book.lookup(position, who)
+        if entry is None:
+            print("not in book")
+        else:
+            column, score, exact = entry
+            print(f"play column {column + 1}, score {score} ({'exact' if exact else 'heuristic'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# Persistent position cache
+#
+# Search results are kept in a file of fixed size slots that is memory-mapped, so they
+# survive from one run (or tournament) to the next and are shared by every process that
+# opens the same file. The file is an open-addressing hash table:
+#
+#   header   8 bytes magic, 8 bytes number of slots
+#   slot     8 bytes check, 8 bytes data
+#
+# data packs the score, depth, bound and move of an entry and check is the position key
+# XOR data. A slot is only believed when check XOR data gives back the key looked for, so
+# a slot being written by another process at the same time reads as a miss instead of a
+# wrong result, and no locking is needed.
+#
+# The keys are the canonical Zobrist keys of the search (see core.search), which come from
+# a fixed seed and so are the same in every process.
+
+import os
+import mmap
+import struct
+
+from core.transposition import TranspositionTable
+
+MAGIC = b"C4CACHE2"  # change the last character when the search scores change meaning
+HEADER = struct.Struct("<8sQ")  # magic, number of slots
+SLOT = struct.Struct("<QQ")  # check, data
+PROBES = 4  # number of neighbouring slots a key may be stored in
+KEY_MASK = (1 << 64) - 1
+
+
+def pack_entry(depth, bound, score, move):
+    """
+    Function to pack an entry into one 64 bit word.
+
+    Args:
+        depth (int): Depth the position was searched to.
+        bound (int): EXACT, LOWER or UPPER.
+        score (int): Score found by the search.
+        move (int): Best column found, or None.
+
+    Returns: The packed word, never 0.
+    """
+    return (int(score) & 0xFFFFFFFF) | depth << 32 | bound << 40 | (0 if move is None else move + 1) << 48 | 1 << 63
+
+
+def unpack_entry(data):
+    """
+    Function to unpack a word written by pack_entry.
+
+    Args:
+        data (int): The packed word.
+
+    Returns: A tuple (depth, bound, score, move).
+    """
+    score = data & 0xFFFFFFFF
+    if score >= 1 << 31:
+        score -= 1 << 32
+    move = (data >> 48) & 0xFF
+    return (data >> 32) & 0xFF, (data >> 40) & 0xFF, score, None if move == 0 else move - 1
+
+
+class PositionCache:
+    """
+    Search results stored in a memory-mapped file, with the lookup and store interface of
+    TranspositionTable. Every entry is a tuple (key, depth, bound, score, move).
+    """
+
+    def __init__(self, path, max_mb=64, readonly=False):
+        """
+        Args:
+            path (str): Cache file, created if it does not exist yet.
+            max_mb (float): Size of a new file in megabytes. An existing file keeps its size.
+            readonly (bool): Only read the file, for processes that should not add results.
+        """
+        if not os.path.exists(path):
+            create_cache_file(path, max(PROBES, int(max_mb * 1024 * 1024 // SLOT.size)))
+        with open(path, "rb" if readonly else "r+b") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+        magic, self.size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or len(self.data) != HEADER.size + self.size * SLOT.size:
+            self.data.close()
+            raise ValueError(f"{path} is not a position cache of this version, delete it to start a new one")
+        self.readonly = readonly
+        self.probes = 0  # number of lookups
+        self.hits = 0  # number of lookups that found the position
+
+    def close(self):
+        """
+        Function to write the cache back to disk and release the mapping.
+        """
+        if not self.readonly:
+            self.data.flush()
+        self.data.close()
+
+    def clear(self):
+        """
+        Function kept for the TranspositionTable interface. The whole point of the file is to
+        keep its entries, so only the counters are reset.
+        """
+        self.probes = 0
+        self.hits = 0
+
+    def lookup(self, key):
+        """
+        Function to find the stored entry for a position.
+
+        Args:
+            key (int): Hash of the position.
+
+        Returns: The (key, depth, bound, score, move) tuple, or None if it is not stored.
+        """
+        self.probes += 1
+        slot = key % self.size
+        for i in range(PROBES):
+            check, data = SLOT.unpack_from(self.data, HEADER.size + (slot + i) % self.size * SLOT.size)
+            if data == 0:
+                return None  # keys are never moved, so the probe ends at the first empty slot
+            if check ^ data == key:
+                self.hits += 1
+                return (key,) + unpack_entry(data)
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        """
+        Function to save a search result. An entry for the same position is only replaced by
+        one searched at least as deep; otherwise the first empty or shallowest slot is taken.
+
+        Args:
+            key (int): Hash of the position.
+            depth (int): Depth the position was searched to.
+            bound (int): EXACT, LOWER or UPPER.
+            score (int): Score found by the search.
+            move (int): Best column found, or None.
+        """
+        if self.readonly:
+            return
+        slot = key % self.size
+        target, shallowest = None, None
+        for i in range(PROBES):
+            offset = HEADER.size + (slot + i) % self.size * SLOT.size
+            check, data = SLOT.unpack_from(self.data, offset)
+            if data == 0 or check ^ data == key:
+                if data != 0 and unpack_entry(data)[0] > depth:
+                    return  # a deeper result is already stored
+                target = offset
+                break
+            stored_depth = (data >> 32) & 0xFF
+            if shallowest is None or stored_depth < shallowest:
+                target, shallowest = offset, stored_depth
+        if shallowest is not None and shallowest > depth:
+            return  # everything near this slot was searched deeper
+        data = pack_entry(depth, bound, score, move)
+        SLOT.pack_into(self.data, target, (key & KEY_MASK) ^ data, data)
+
+
+def create_cache_file(path, slots):
+    """
+    Function to write an empty cache file. It is written under a temporary name and then
+    hard linked to its real name, so another process never sees a half written header.
+    Linking fails if the file exists, so when several processes start at once only the
+    first one creates it and every process maps that same file.
+
+    Args:
+        path (str): Cache file to create.
+        slots (int): Number of slots in the file.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, slots))
+        f.truncate(HEADER.size + slots * SLOT.size)  # the slots read as zeros, which means empty
+    try:
+        os.link(temporary, path)
+    except FileExistsError:
+        pass  # another process created it first, use that one
+    finally:
+        os.remove(temporary)
+
+
+class TieredTable:
+    """
+    In-memory transposition table in front of a PositionCache. Lookups try the memory table
+    first, and results found in the file are copied into it. Results of searches at least
+    min_depth deep are also written to the file; shallower ones are cheap to search again
+    and would only push useful entries out.
+    """
+
+    def __init__(self, cache, table=None, min_depth=3):
+        """
+        Args:
+            cache (PositionCache): The file backed cache.
+            table (TranspositionTable): In-memory table, a new one of the default size if None.
+            min_depth (int): Shallowest search result written to the file.
+        """
+        self.cache = cache
+        self.table = TranspositionTable() if table is None else table
+        self.min_depth = min_depth
+
+    @property
+    def probes(self):
+        return self.table.probes
+
+    @property
+    def hits(self):
+        return self.table.hits + self.cache.hits
+
+    def clear(self):
+        """
+        Function to empty the in-memory table. The file keeps its entries.
+        """
+        self.table.clear()
+        self.cache.clear()
+
+    def lookup(self, key):
+        """
+        Function to find the stored entry for a position.
+
+        Args:
+            key (int): Hash of the position.
+
+        Returns: The (key, depth, bound, score, move) tuple, or None if it is not stored.
+        """
+        entry = self.table.lookup(key)
+        if entry is None:
+            entry = self.cache.lookup(key)
+            if entry is not None:
+                self.table.store(*entry)
+        return entry
+
+    def store(self, key, depth, bound, score, move):
+        """
+        Function to save a search result.
+
+        Args:
+            key (int): Hash of the position.
+            depth (int): Depth the position was searched to.
+            bound (int): EXACT, LOWER or UPPER.
+            score (int): Score found by the search.
+            move (int): Best column found, or None.
+        """
+        self.table.store(key, depth, bound, score, move)
+        if depth >= self.min_depth:
+            self.cache.store(key, depth, bound, score, move)
@@ -0,0 +1,160 @@
+# Heuristic evaluation of bitboard positions
+#
+# This is the same scoring as score_pos/calculate_score in the agent scripts, but every
+# 4 cell window comes from the tables in core.windows, stored as a bit mask so that the
+# pieces in it can be counted with bit_count() instead of building lists.
+#
+# During a search the Evaluator class keeps the score up to date move by move, so a
+# leaf costs a lookup instead of a pass over all 69 windows.
+
+from core.bitboard import COL_BITS, NUM_COLS
+from core.windows import BIT_WINDOWS, WINDOW_MASKS
+
+
+def calculate_score(mine, theirs):
+    """
+    Function to calculate the score for a given window.
+
+    Args:
+        mine (int): Number of the player's pieces in the window.
+        theirs (int): Number of the opponent's pieces in the window.
+
+    Returns: Score of the particular window.
+    """
+    score = 0
+    empty = 4 - mine - theirs
+    if mine == 4:
+        score += 100
+    elif mine == 3 and empty == 1:
+        score += 10
+    elif mine == 2 and empty == 2:
+        score += 5
+    if theirs == 3 and empty == 1:
+        score -= 80
+    return score
+
+
+# Score of a window indexed by [pieces of the player][pieces of the opponent]
+WINDOW_SCORES = [[calculate_score(mine, theirs) if mine + theirs <= 4 else 0 for theirs in range(5)]
+                 for mine in range(5)]
+
+
+def score_pos(position, who):
+    """
+    Function to calculate the score for current board state.
+
+    Args:
+        position (Position): current state of the game board.
+        who (int): The player's number (1 or 2).
+
+    Returns: Score of the board at current state.
+    """
+    mine = position.bits[who - 1]
+    theirs = position.bits[2 - who]
+    score = 0
+    for mask in WINDOW_MASKS:
+        score += WINDOW_SCORES[(mine & mask).bit_count()][(theirs & mask).bit_count()]
+    return score
+
+# Change of the window score for the player adding a piece and for the opponent,
+# indexed by [pieces of the player][pieces of the opponent] before the move
+ADD_DELTAS = [[(WINDOW_SCORES[mine + 1][theirs] - WINDOW_SCORES[mine][theirs],
+                WINDOW_SCORES[theirs][mine + 1] - WINDOW_SCORES[theirs][mine]) if mine + theirs < 4 else (0, 0)
+               for theirs in range(5)] for mine in range(5)]
+
+
+class Evaluator:
+    """
+    Keeps score_pos up to date for both players while moves are made and undone.
+
+    For every window it stores how many pieces each player has in it, so a move only
+    has to look at the (at most 16) windows through the cell it fills.
+    """
+
+    def __init__(self, position):
+        """
+        Args:
+            position (Position): Position whose pieces are counted to start with.
+        """
+        self.counts = [[0] * len(WINDOW_MASKS), [0] * len(WINDOW_MASKS)]  # pieces per window for player 1 and 2
+        self.scores = [0, 0]  # score_pos(position, 1) and score_pos(position, 2)
+        for who in (1, 2):
+            bits = position.bits[who - 1]
+            for index in range(NUM_COLS * COL_BITS):
+                if bits >> index & 1:
+                    self.add(index, who)
+
+    def add(self, index, who):
+        """
+        Function to count a new piece.
+
+        Args:
+            index (int): Bit index of the cell the piece was dropped into.
+            who (int): The player's number (1 or 2).
+        """
+        mine = self.counts[who - 1]
+        theirs = self.counts[2 - who]
+        gained = lost = 0
+        for w in BIT_WINDOWS[index]:
+            delta = ADD_DELTAS[mine[w]][theirs[w]]
+            gained += delta[0]
+            lost += delta[1]
+            mine[w] += 1
+        self.scores[who - 1] += gained
+        self.scores[2 - who] += lost
+
+    def remove(self, index, who):
+        """
+        Function to take a piece out of the counts again.
+
+        Args:
+            index (int): Bit index of the cell the piece is taken from.
+            who (int): The player's number (1 or 2).
+        """
+        mine = self.counts[who - 1]
+        theirs = self.counts[2 - who]
+        gained = lost = 0
+        for w in BIT_WINDOWS[index]:
+            mine[w] -= 1
+            delta = ADD_DELTAS[mine[w]][theirs[w]]
+            gained += delta[0]
+            lost += delta[1]
+        self.scores[who - 1] -= gained
+        self.scores[2 - who] -= lost
+
+    def play(self, position, coli, who):
+        """
+        Function to make a move on the position and update the score.
+
+        Args:
+            position (Position): The position this evaluator follows.
+            coli (int): The column index to drop the piece into.
+            who (int): The player making the move (1 or 2).
+
+        Returns: The row index where the piece was dropped.
+        """
+        self.add(coli * COL_BITS + position.heights[coli], who)
+        return position.play(coli, who)
+
+    def undo(self, position, coli, who):
+        """
+        Function to undo the last move in a column and update the score.
+
+        Args:
+            position (Position): The position this evaluator follows.
+            coli (int): The column index to take the piece from.
+            who (int): The player whose piece is on top of the column.
+        """
+        position.undo(coli)
+        self.remove(coli * COL_BITS + position.heights[coli], who)
+
+    def score(self, who):
+        """
+        Function to read the score for current board state.
+
+        Args:
+            who (int): The player's number (1 or 2).
+
+        Returns: The same value as score_pos(position, who).
+        """
+        return self.scores[who - 1]
@@ -0,0 +1,425 @@
+# Monte Carlo Tree Search (UCT) on bitboard positions
+#
+# The tree is stored in flat lists indexed by node number instead of one object per
+# node. The children of a node are created together, so they are the node numbers
+# first[node] .. first[node] + count[node] - 1.
+#
+# value[node] is the total result of the playouts through the node, counted for the
+# player who made the move into it (1 for a win, 0.5 for a draw, 0 for a loss).
+#
+# Leaves are collected in batches and their random playouts are run together. With
+# NumPy installed the batch goes to core.simulate, otherwise it is played out in Python.
+#
+# ParallelTrees spreads a move over several processes (root parallelisation): every
+# process grows its own tree from the same position with its own random playouts, and
+# the visits of the root moves are added up over all the trees.
+
+import math
+import os
+import random
+import time
+
+from core.bitboard import NUM_COLS, NUM_ROWS
+from core.ordering import CENTRE_ORDER
+from core import simulate
+
+EXPLORATION = 1.4  # weight of the exploration term in the UCT formula
+
+shared_stop = None  # set to 1 by ParallelTrees.stop, set up in every worker by init_worker
+
+
+def python_playout(position, who, rng):
+    """
+    Function to finish a game with random legal moves, without NumPy.
+
+    Args:
+        position (Position): Position to play out. It is changed.
+        who (int): The player to move (1 or 2).
+        rng (random.Random): Source of the random moves.
+
+    Returns: 1 if the player to move at the start won, -1 if the other player won, 0 for a draw.
+    """
+    sign = 1
+    while not position.is_full():
+        coli = rng.choice(position.valid_moves())
+        if position.is_winning_move(coli, who):
+            return sign
+        position.play(coli, who)
+        who = 3 - who
+        sign = -sign
+    return 0
+
+
+class Tree:
+    """
+    Search tree of a Monte Carlo Tree Search, rooted at one position.
+    """
+
+    def __init__(self, position, who, seed=None):
+        """
+        Args:
+            position (Position): The position at the root.
+            who (int): The player to move at the root (1 or 2).
+            seed (int): Seed for the random playouts.
+        """
+        self.rng = random.Random(seed)
+        numpy = simulate.load_numpy()
+        self.np_rng = numpy.random.default_rng(seed) if numpy is not None else None
+        self.reset(position, who)
+
+    def reset(self, position, who):
+        """
+        Function to throw the tree away and start again from a position.
+
+        Args:
+            position (Position): The position at the root.
+            who (int): The player to move at the root (1 or 2).
+        """
+        self.root_position = position.copy()
+        self.root_who = who
+        self.parent = []
+        self.move = []  # column played to reach the node
+        self.visits = []
+        self.value = []
+        self.first = []  # number of the first child, -1 until the node is expanded
+        self.count = []  # number of children
+        self.terminal = []  # result for the player who moved into the node if the game is over, else None
+        self.root = self.new_node(-1, None, None)
+
+    def new_node(self, parent, move, terminal):
+        """
+        Function to add an unexpanded node.
+
+        Args:
+            parent (int): Number of the parent node, -1 for the root.
+            move (int): Column played to reach the node.
+            terminal (float): Result if the game ends with this move, None otherwise.
+
+        Returns: Number of the new node.
+        """
+        self.parent.append(parent)
+        self.move.append(move)
+        self.visits.append(0)
+        self.value.append(0.0)
+        self.first.append(-1)
+        self.count.append(0)
+        self.terminal.append(terminal)
+        return len(self.parent) - 1
+
+    def size(self):
+        """
+        Function to count the nodes in the store (including ones cut off by advance).
+
+        Returns: Number of nodes.
+        """
+        return len(self.parent)
+
+    def expand(self, node, position, who):
+        """
+        Function to create the children of a node, centre columns first.
+
+        Args:
+            node (int): Number of the node.
+            position (Position): Position at the node.
+            who (int): The player to move at the node.
+        """
+        moves = [c for c in CENTRE_ORDER if position.can_play(c)]
+        last = position.count + 1 == NUM_ROWS * NUM_COLS  # the next move fills the board
+        self.first[node] = len(self.parent)
+        self.count[node] = len(moves)
+        for col in moves:
+            if position.is_winning_move(col, who):
+                terminal = 1.0
+            elif last:
+                terminal = 0.5
+            else:
+                terminal = None
+            self.new_node(node, col, terminal)
+
+    def best_child(self, node):
+        """
+        Function to pick the child to explore with the UCT formula. Unvisited children come first.
+
+        Args:
+            node (int): Number of an expanded node.
+
+        Returns: Number of the chosen child.
+        """
+        visits = self.visits
+        value = self.value
+        log_visits = math.log(visits[node])
+        best, best_score = -1, -1.0
+        for child in range(self.first[node], self.first[node] + self.count[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            score = value[child] / n + EXPLORATION * math.sqrt(log_visits / n)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def select(self):
+        """
+        Function to walk down the tree to a node that needs a playout.
+
+        Every node on the way gets its visit counted straight away (a "virtual loss"), so the
+        next selection of the same batch tends to go somewhere else.
+
+        Returns: A tuple (node, position, who). position is None when the node ends the game.
+        """
+        node = self.root
+        position = self.root_position.copy()
+        who = self.root_who
+        while True:
+            self.visits[node] += 1
+            if self.terminal[node] is not None:
+                return node, None, who
+            if self.first[node] < 0:
+                if node != self.root and self.visits[node] == 1:
+                    return node, position, who
+                self.expand(node, position, who)
+            node = self.best_child(node)
+            position.play(self.move[node], who)
+            who = 3 - who
+
+    def backup(self, node, score):
+        """
+        Function to add a playout result to a node and all the nodes above it.
+
+        Args:
+            node (int): Number of the node the playout started from.
+            score (float): Result for the player who moved into the node.
+        """
+        while node >= 0:
+            self.value[node] += score
+            score = 1.0 - score
+            node = self.parent[node]
+
+    def playout_batch(self, leaves):
+        """
+        Function to play out a batch of leaves and back the results up.
+
+        Args:
+            leaves (list): (node, position, who) tuples from select.
+        """
+        pending = []
+        for node, position, who in leaves:
+            if position is None:
+                self.backup(node, self.terminal[node])
+            else:
+                pending.append((node, position, who))
+        if not pending:
+            return
+        if self.np_rng is not None:
+            np = simulate.np
+            mover = np.array([p.bits[w - 1] for n, p, w in pending], dtype=np.uint64)
+            other = np.array([p.bits[2 - w] for n, p, w in pending], dtype=np.uint64)
+            heights = np.array([p.heights for n, p, w in pending], dtype=np.int64)
+            results = simulate.random_playouts(mover, other, heights, self.np_rng)[0].tolist()
+        else:
+            results = [python_playout(p, w, self.rng) for n, p, w in pending]
+        for (node, position, who), result in zip(pending, results):
+            self.backup(node, (1 - result) / 2)  # result is for the player to move at the leaf
+
+    def run(self, playouts=None, time_limit=None, batch=128, stop=None):
+        """
+        Function to grow the tree.
+
+        Args:
+            playouts (int): Number of playouts to run, or None to go until time_limit.
+            time_limit (float): Seconds to run for, or None to go until playouts is reached.
+            batch (int): Number of leaves played out together.
+            stop (callable): Optional check called after every batch, the run ends when it returns True.
+        """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        done = 0
+        while playouts is None or done < playouts:
+            size = batch if playouts is None else min(batch, playouts - done)
+            self.playout_batch([self.select() for i in range(size)])
+            done += size
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if stop is not None and stop():
+                break
+            if playouts is None and deadline is None:
+                break
+
+    def root_children(self):
+        """
+        Function to list the children of the root, expanding it if needed.
+
+        Returns: Range of the node numbers of the children.
+        """
+        root = self.root
+        if self.first[root] < 0:
+            self.expand(root, self.root_position, self.root_who)
+        return range(self.first[root], self.first[root] + self.count[root])
+
+    def root_visits(self):
+        """
+        Function to count the visits of every move at the root.
+
+        Returns: Dict from column to number of visits.
+        """
+        return {self.move[child]: self.visits[child] for child in self.root_children()}
+
+    def best_move(self):
+        """
+        Function to pick the move to play: the most visited child of the root.
+
+        Returns: Column of the move.
+        """
+        children = self.root_children()
+        # a move that wins at once is always played
+        for child in children:
+            if self.terminal[child] == 1.0:
+                return self.move[child]
+        return self.move[max(children, key=lambda child: self.visits[child])]
+
+    def advance(self, position, who):
+        """
+        Function to move the root to a later position, keeping the subtree below it.
+
+        Looks for the position among the children and grandchildren of the root, which covers
+        the agent's own move followed by the opponent's reply.
+
+        Args:
+            position (Position): The new position.
+            who (int): The player to move in it.
+
+        Returns: True if the subtree was kept, False if the tree had to start again.
+        """
+        if who == self.root_who and position.hash == self.root_position.hash:
+            return True
+        frontier = [(self.root, self.root_position.copy(), self.root_who)]
+        for depth in range(2):
+            deeper = []
+            for node, current, mover in frontier:
+                if self.first[node] < 0:
+                    continue
+                for child in range(self.first[node], self.first[node] + self.count[node]):
+                    child_position = current.copy()
+                    child_position.play(self.move[child], mover)
+                    if child_position.hash == position.hash and 3 - mover == who:
+                        if self.terminal[child] is not None:
+                            break
+                        self.root = child
+                        self.parent[child] = -1  # results stop at the new root
+                        self.root_position = position.copy()
+                        self.root_who = who
+                        return True
+                    deeper.append((child, child_position, 3 - mover))
+            frontier = deeper
+        self.reset(position, who)
+        return False
+
+
+def init_worker(stop):
+    """
+    Function run once in every worker process of ParallelTrees.
+
+    Args:
+        stop (multiprocessing.Value): Shared stop flag.
+    """
+    global shared_stop
+    shared_stop = stop
+    simulate.load_numpy()  # now rather than during the first move
+
+
+def grow_tree(position, who, seed, playouts, time_limit, batch):
+    """
+    Function to grow one tree of a root-parallel search. Runs inside a worker process.
+
+    Args:
+        position (Position): The position at the root.
+        who (int): The player to move at the root (1 or 2).
+        seed (int): Seed for this tree's random playouts.
+        playouts (int): Number of playouts to run, or None to go until time_limit.
+        time_limit (float): Seconds to run for, or None to go until playouts is reached.
+        batch (int): Number of leaves played out together.
+
+    Returns: Dict from column to number of visits of the root move in this tree.
+    """
+    tree = Tree(position, who, seed)
+    tree.run(playouts, time_limit, batch, lambda: shared_stop.value != 0)
+    return tree.root_visits()
+
+
+class ParallelTrees:
+    """
+    Runs root-parallel Monte Carlo Tree Searches on a pool of worker processes.
+    The trees are not kept between moves.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int): Number of worker processes, all cores by default.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        import multiprocessing  # imported here so that importing the engine stays fast
+        from concurrent.futures import ProcessPoolExecutor
+        self.stopped = multiprocessing.Value("b", 0)  # set by stop to end the search early
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(self.stopped,))
+        # start the processes now, so that the first move does not wait for them
+        for future in [self.pool.submit(os.getpid) for i in range(self.workers)]:
+            future.result()
+
+    def stop(self):
+        """
+        Function to make a search running on another thread return after its current batches.
+        """
+        self.stopped.value = 1
+
+    def close(self):
+        """
+        Function to shut the worker processes down.
+        """
+        self.pool.shutdown()
+
+    def root_visits(self, position, who, seed=None, playouts=None, time_limit=None, batch=128):
+        """
+        Function to grow one tree per worker and add up the visits of the root moves.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player to move (1 or 2).
+            seed (int): Seed for the random playouts, or None.
+            playouts (int): Number of playouts over all the trees, or None to go until time_limit.
+            time_limit (float): Seconds every tree grows for, or None to go until playouts is reached.
+            batch (int): Number of leaves each tree plays out together.
+
+        Returns: Dict from column to the number of visits of the move over all the trees.
+        """
+        self.stopped.value = 0
+        share = None if playouts is None else max(1, -(-playouts // self.workers))
+        futures = []
+        for i in range(self.workers):
+            tree_seed = None if seed is None else (seed * (NUM_ROWS * NUM_COLS + 1) + position.count) * self.workers + i
+            futures.append(self.pool.submit(grow_tree, position, who, tree_seed, share, time_limit, batch))
+        visits = {}
+        for future in futures:
+            for col, count in future.result().items():
+                visits[col] = visits.get(col, 0) + count
+        return visits
+
+    def best_move(self, position, who, seed=None, playouts=None, time_limit=None, batch=128):
+        """
+        Function to choose a move with one tree per worker.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player to move (1 or 2).
+            seed (int): Seed for the random playouts, or None.
+            playouts (int): Number of playouts over all the trees, or None to go until time_limit.
+            time_limit (float): Seconds every tree grows for, or None to go until playouts is reached.
+            batch (int): Number of leaves each tree plays out together.
+
+        Returns: Column of the move: a winning move if there is one, else the root move with the
+            most visits over all the trees (the one nearest the centre among equals).
+        """
+        for col in CENTRE_ORDER:
+            if position.can_play(col) and position.is_winning_move(col, who):
+                return col
+        visits = self.root_visits(position, who, seed, playouts, time_limit, batch)
+        return max((col for col in CENTRE_ORDER if col in visits), key=lambda col: visits[col])
@@ -0,0 +1,107 @@
+# Move ordering for the alpha-beta search
+#
+# Alpha-beta prunes the most when the best move is searched first. An orderer is given
+# the legal columns of a node and returns them in the order they should be tried.
+
+from core.bitboard import NUM_COLS, NUM_ROWS
+
+# Columns from the centre outwards (3, 2, 4, 1, 5, 0, 6 on a 7 column board)
+CENTRE_ORDER = sorted(range(NUM_COLS), key=lambda c: (abs(2 * c - (NUM_COLS - 1)), c))
+CENTRE_RANK = [CENTRE_ORDER.index(c) for c in range(NUM_COLS)]
+
+
+class StaticOrderer:
+    """
+    Orders moves centre-first, with the hinted move (transposition table or previous
+    iteration) in front.
+    """
+
+    def order(self, moves, ply, who, hint=None):
+        """
+        Function to sort the legal moves of a node.
+
+        Args:
+            moves (list): Legal columns, from left to right.
+            ply (int): Number of pieces on the board at the node.
+            who (int): The player to move (1 or 2).
+            hint (int): Column that should be tried first, or None.
+
+        Returns: List of the same columns in the order to search them.
+        """
+        ordered = [c for c in CENTRE_ORDER if c in moves and c != hint]
+        if hint in moves:
+            ordered.insert(0, hint)
+        return ordered
+
+    def record_cutoff(self, col, ply, who, depth):
+        """
+        Function to learn from a move that caused a beta cutoff.
+
+        Args:
+            col (int): The column that caused the cutoff.
+            ply (int): Number of pieces on the board at the node.
+            who (int): The player who made the move.
+            depth (int): Remaining depth of the node.
+        """
+
+    def clear(self):
+        """
+        Function to forget everything learnt from earlier searches.
+        """
+
+
+class MoveOrderer(StaticOrderer):
+    """
+    Orders moves by hint, then killer moves, then history score, then centre-first.
+    """
+
+    def __init__(self, killers=True, history=True):
+        """
+        Args:
+            killers (bool): Try the last two moves that caused a cutoff at the same ply early.
+            history (bool): Prefer columns that caused many deep cutoffs before.
+        """
+        self.use_killers = killers
+        self.use_history = history
+        self.clear()
+
+    def clear(self):
+        """
+        Function to forget the killer moves and the history table.
+        """
+        self.killers = [[None, None] for ply in range(NUM_ROWS * NUM_COLS + 1)]
+        self.history = [[0] * NUM_COLS, [0] * NUM_COLS]
+
+    def order(self, moves, ply, who, hint=None):
+        """
+        Function to sort the legal moves of a node.
+
+        Args:
+            moves (list): Legal columns, from left to right.
+            ply (int): Number of pieces on the board at the node.
+            who (int): The player to move (1 or 2).
+            hint (int): Column that should be tried first, or None.
+
+        Returns: List of the same columns in the order to search them.
+        """
+        killers = self.killers[ply] if self.use_killers else ()
+        history = self.history[who - 1] if self.use_history else [0] * NUM_COLS
+        return sorted(moves, key=lambda c: (c != hint, c not in killers, -history[c], CENTRE_RANK[c]))
+
+    def record_cutoff(self, col, ply, who, depth):
+        """
+        Function to learn from a move that caused a beta cutoff.
+
+        Args:
+            col (int): The column that caused the cutoff.
+            ply (int): Number of pieces on the board at the node.
+            who (int): The player who made the move.
+            depth (int): Remaining depth of the node.
+        """
+        if self.use_killers:
+            killers = self.killers[ply]
+            if killers[0] != col:
+                killers[1] = killers[0]
+                killers[0] = col
+        if self.use_history:
+            self.history[who - 1][col] += depth * depth
@@ -0,0 +1,231 @@
+# Root-parallel minimax
+#
+# Every move at the root is searched as a separate task in a pool of worker processes.
+# The best score found so far is kept in shared memory; a task reads it when it starts
+# and uses it as its alpha (or beta) bound, so moves searched later are cut just like
+# in the serial search.
+#
+# A stop flag is shared too. Workers look at it, and at the deadline of the search, every
+# CHECK_EVERY nodes like the serial search does, so an iteration that runs out of time or
+# is stopped from another thread ends within a few milliseconds.
+#
+# The bound is loosened by one point before it is used, so a move that only ties with
+# the best so far still gets its exact score. The chosen move is the first one, in
+# centre-first order, with the best score. This is the same move as
+#
+#   Searcher(orderer=StaticOrderer()).minimax(position, depth, -math.inf, math.inf, maximizingPlayer)
+
+import math
+import os
+import time
+
+from core.bitboard import NUM_COLS, NUM_ROWS
+from core.ordering import CENTRE_ORDER, MoveOrderer
+from core.search import WIN_SCORE, Searcher, SearchTimeout, terminal_score
+from core.transposition import TranspositionTable
+
+GROWTH = 4  # expected ratio between the times of two successive iterations
+
+shared_best = None  # best root score so far, set up in every worker by init_worker
+shared_stop = None  # set to 1 by ParallelSearcher.stop, set up in every worker by init_worker
+
+
+def init_worker(best, stop):
+    """
+    Function run once in every worker process.
+
+    Args:
+        best (multiprocessing.Value): Shared best root score.
+        stop (multiprocessing.Value): Shared stop flag.
+    """
+    global shared_best, shared_stop
+    shared_best = best
+    shared_stop = stop
+
+
+class WorkerSearcher(Searcher):
+    """
+    Searcher of a worker process, which also stops when the shared stop flag is set.
+    """
+
+    def out_of_budget(self):
+        """
+        Function to check if the search should stop.
+
+        Returns: True if the search was stopped or its budget is used up, False otherwise.
+        """
+        return shared_stop.value != 0 or Searcher.out_of_budget(self)
+
+
+def search_root_move(position, col, depth, maximizingPlayer, deadline=None):
+    """
+    Function to search one root move. Runs inside a worker process.
+
+    Args:
+        position (Position): The root position.
+        col (int): The root move to search.
+        depth (int): Depth of the whole search, counting the root move.
+        maximizingPlayer (bool): Indicates whether the player at the root is maximizing or minimizing.
+        deadline (float): time.time() at which the search has to stop (math.inf for no time limit,
+            but still stopped by the stop flag), or None to always search to the end.
+
+    Returns: A tuple (column, score, nodes). The score is exact if it is at least as good as the
+        best score that was known when the task started, otherwise it is only a bound. It is
+        None if the search was stopped before it finished.
+    """
+    if deadline is not None and (shared_stop.value != 0 or time.time() >= deadline):
+        return col, None, 0
+    who = 2 if maximizingPlayer else 1
+    if position.is_winning_move(col, who):
+        return col, WIN_SCORE if maximizingPlayer else -WIN_SCORE, 1
+    position.play(col, who)
+    best = shared_best.value
+    if maximizingPlayer:
+        alpha, beta = best - 1, math.inf
+    else:
+        alpha, beta = -math.inf, best + 1
+    # a fresh table per task, so that every score is the exact fixed depth score
+    time_limit = None if deadline is None or deadline == math.inf else deadline - time.time()
+    searcher = WorkerSearcher(TranspositionTable(8), time_limit, orderer=MoveOrderer())
+    searcher.start_budget()
+    try:
+        value = searcher.minimax(position, depth - 1, alpha, beta, not maximizingPlayer, deadline is not None)[1]
+    except SearchTimeout:
+        return col, None, searcher.nodes + 1
+    with shared_best.get_lock():
+        if (value > shared_best.value) if maximizingPlayer else (value < shared_best.value):
+            shared_best.value = value
+    return col, value, searcher.nodes + 1
+
+
+class ParallelSearcher:
+    """
+    Runs root-parallel minimax searches on a pool of worker processes.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int): Number of worker processes, all cores by default.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        import multiprocessing  # imported here so that importing the engine stays fast
+        from concurrent.futures import ProcessPoolExecutor
+        self.best = multiprocessing.Value("d", 0.0)
+        self.stopped = multiprocessing.Value("b", 0)  # set by stop to end the search early
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                        initargs=(self.best, self.stopped))
+        self.nodes = 0  # nodes visited by the last search, over all workers
+
+    def stop(self):
+        """
+        Function to make an iterative deepening search running on another thread return as
+        soon as it can, with the result of the deepest iteration that finished.
+        """
+        self.stopped.value = 1
+
+    def close(self):
+        """
+        Function to shut the worker processes down.
+        """
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def minimax(self, position, depth, maximizingPlayer=True, deadline=None):
+        """
+        Function to search a position to a fixed depth, one root move per task.
+
+        Args:
+            position (Position): current state of the game board.
+            depth (int): The depth of the search tree.
+            maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+            deadline (float): time.time() at which the search has to stop (math.inf for no time limit,
+                but still stopped by stop), or None to always search to the end.
+
+        Returns: A tuple containing the best column for the current player and the corresponding score.
+        Raises SearchTimeout if the deadline passed or stop was called before every move was searched.
+        """
+        score = terminal_score(position)
+        if score is not None:
+            return (None, score)
+        if depth == 0:
+            return Searcher().minimax(position, 0, -math.inf, math.inf, maximizingPlayer)
+        self.best.value = -math.inf if maximizingPlayer else math.inf
+        moves = [c for c in CENTRE_ORDER if position.can_play(c)]
+        futures = [self.pool.submit(search_root_move, position, col, depth, maximizingPlayer, deadline)
+                   for col in moves]
+        results = {}
+        self.nodes = 1
+        for future in futures:
+            col, value, nodes = future.result()
+            results[col] = value
+            self.nodes += nodes
+        if None in results.values():
+            raise SearchTimeout()
+        pick = max if maximizingPlayer else min
+        value = pick(results.values())
+        column = next(col for col in moves if results[col] == value)
+        return (column, value)
+
+    def iterative_deepening(self, position, time_limit=None, max_depth=None, maximizingPlayer=True):
+        """
+        Function to run parallel searches of depth 1, 2, 3, ... while time is left.
+
+        The first iteration always runs to completion so that there is a move to return. Later
+        iterations are stopped at the time limit or by stop, and then the result of the one
+        before is kept. A new depth is not started if it is unlikely to finish in time
+        (assuming it takes GROWTH times as long as the one before).
+
+        Args:
+            position (Position): current state of the game board.
+            time_limit (float): Seconds the search may run for, or None for no limit.
+            max_depth (int): Deepest iteration to run, or None to go until the board is full.
+            maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+
+        Returns: A tuple (column, score, depth) from the deepest iteration.
+        """
+        empty = NUM_ROWS * NUM_COLS - position.count
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        self.stopped.value = 0
+        start_time = time.perf_counter()
+        deadline = math.inf if time_limit is None else time.time() + time_limit
+        column, value, reached = None, 0, 0
+        last_time = 0
+        for depth in range(1, max(1, max_depth) + 1):
+            if time_limit is not None and depth > 1:
+                elapsed = time.perf_counter() - start_time
+                if elapsed + last_time * GROWTH > time_limit:
+                    break
+            if self.stopped.value != 0 and depth > 1:
+                break
+            iteration_start = time.perf_counter()
+            try:
+                column, value = self.minimax(position, depth, maximizingPlayer, deadline if depth > 1 else None)
+            except SearchTimeout:
+                break
+            reached = depth
+            last_time = time.perf_counter() - iteration_start
+            if abs(value) >= WIN_SCORE:
+                break
+        return (column, value, reached)
+
+
+def parallel_minimax(position, depth, maximizingPlayer=True, workers=None):
+    """
+    Function to run one root-parallel search with a temporary pool of workers.
+
+    Args:
+        position (Position): current state of the game board.
+        depth (int): The depth of the search tree.
+        maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+        workers (int): Number of worker processes, all cores by default.
+
+    Returns: A tuple containing the best column for the current player and the corresponding score.
+    """
+    with ParallelSearcher(workers) as searcher:
+        return searcher.minimax(position, depth, maximizingPlayer)
@@ -0,0 +1,195 @@
+# Perft: counting the positions reachable in a number of moves
+#
+# perft(d) is the number of move sequences of length d from a position, where a game
+# stops as soon as somebody wins (a won game is counted if it ends on move d and not
+# followed any further if it ends sooner). Every board representation has to give the
+# same counts, so comparing them with REFERENCE checks the move generation and the
+# win detection, and timing them compares the speed of the representations:
+#
+#   list      a 6x7 list board like the original scripts, with the windows through the last move
+#   bitboard  core.bitboard.Position
+#   numpy     whole levels of the tree at once as uint64 arrays (needs NumPy)
+#
+# Run it with
+#
+#   python -m core.perft --depth 7
+
+import sys
+import time
+
+from core import simulate
+from core.bitboard import COL_BITS, NUM_COLS, NUM_ROWS, Position
+from core.windows import CELL_WINDOWS, WINDOWS
+
+# perft counts from the empty board, depth: count (all three backends agree on them)
+REFERENCE = {
+    1: 7,
+    2: 49,
+    3: 343,
+    4: 2401,
+    5: 16807,
+    6: 117649,
+    7: 823536,
+    8: 5673234,
+    9: 39394572,
+    10: 268031646,
+}
+
+CHUNK = 1 << 18  # most positions the numpy backend expands at once
+
+
+def perft_list(board, who, depth):
+    """
+    Function to count the move sequences of a list board.
+
+    Args:
+        board (2D list): list containing current state of the game board, changed and restored.
+        who (int): The player to move (1 or 2).
+        depth (int): Number of moves in each sequence.
+
+    Returns: The number of sequences.
+    """
+    count = 0
+    for coli in range(NUM_COLS):
+        if board[0][coli] != 0:
+            continue
+        if depth == 1:
+            count += 1
+            continue
+        rowi = NUM_ROWS - 1
+        while board[rowi][coli] != 0:
+            rowi -= 1
+        board[rowi][coli] = who
+        won = False
+        for w in CELL_WINDOWS[rowi][coli]:
+            if all(board[r][c] == who for r, c in WINDOWS[w]):
+                won = True
+                break
+        if not won:
+            count += perft_list(board, 3 - who, depth - 1)
+        board[rowi][coli] = 0
+    return count
+
+
+def perft_bitboard(position, who, depth):
+    """
+    Function to count the move sequences of a bitboard position.
+
+    Args:
+        position (Position): current state of the game board, changed and restored.
+        who (int): The player to move (1 or 2).
+        depth (int): Number of moves in each sequence.
+
+    Returns: The number of sequences.
+    """
+    moves = position.valid_moves()
+    if depth == 1:
+        return len(moves)
+    count = 0
+    for col in moves:
+        if not position.is_winning_move(col, who):
+            position.play(col, who)
+            count += perft_bitboard(position, 3 - who, depth - 1)
+            position.undo(col)
+    return count
+
+
+def perft_numpy(current, mask, depth):
+    """
+    Function to count the move sequences of many positions at once.
+
+    Args:
+        current (numpy array): uint64 bitmaps of the pieces of the player to move.
+        mask (numpy array): uint64 bitmaps of every piece on the board.
+        depth (int): Number of moves in each sequence.
+
+    Returns: The number of sequences from all the positions together.
+    """
+    np = simulate.np
+    if len(current) > CHUNK:
+        return sum(perft_numpy(current[i:i + CHUNK], mask[i:i + CHUNK], depth) for i in range(0, len(current), CHUNK))
+    count = 0
+    children_current, children_mask = [], []
+    for col in range(NUM_COLS):
+        column = np.uint64(((1 << NUM_ROWS) - 1) << (col * COL_BITS))
+        move = (mask + np.uint64(1 << (col * COL_BITS))) & column  # lowest empty cell of the column
+        legal = move != 0
+        if depth == 1:
+            count += int(legal.sum())
+            continue
+        mover = current[legal] | move[legal]
+        going = ~simulate.four_in_a_row(mover)
+        children_mask.append((mask[legal] | move[legal])[going])
+        children_current.append((current[legal] ^ mask[legal])[going])  # the opponent moves next
+    if depth == 1:
+        return count
+    return perft_numpy(np.concatenate(children_current), np.concatenate(children_mask), depth - 1)
+
+
+def run_perft(backend, position, who, depth):
+    """
+    Function to count the move sequences with one of the backends.
+
+    Args:
+        backend (str): "list", "bitboard" or "numpy".
+        position (Position): current state of the game board.
+        who (int): The player to move (1 or 2).
+        depth (int): Number of moves in each sequence.
+
+    Returns: A tuple (count, seconds).
+    """
+    if depth == 0:
+        return 1, 0.0
+    start_time = time.perf_counter()
+    if backend == "list":
+        count = perft_list(position.to_board(), who, depth)
+    elif backend == "bitboard":
+        count = perft_bitboard(position.copy(), who, depth)
+    elif backend == "numpy":
+        simulate.require_numpy()
+        np = simulate.np
+        current = np.array([position.bits[who - 1]], dtype=np.uint64)
+        mask = np.array([position.bits[0] | position.bits[1]], dtype=np.uint64)
+        count = perft_numpy(current, mask, depth)
+    else:
+        raise ValueError(f"unknown backend {backend!r}")
+    return count, time.perf_counter() - start_time
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+
+    parser = argparse.ArgumentParser(description="Count and time the move sequences of a Connect 4 position.")
+    parser.add_argument("--depth", type=int, default=6, help="number of moves in each sequence")
+    parser.add_argument("--moves", default="", help="columns played before counting, 1-7, e.g. 4453")
+    parser.add_argument("--backends", nargs="+", default=["list", "bitboard", "numpy"],
+                        choices=["list", "bitboard", "numpy"], help="board representations to run")
+    args = parser.parse_args(argv)
+
+    position, who = Position(), 1
+    for move in args.moves:
+        position.play(int(move) - 1, who)
+        who = 3 - who
+    expected = REFERENCE.get(args.depth) if not args.moves else None
+
+    counts = set()
+    failed = False
+    for backend in args.backends:
+        if backend == "numpy" and simulate.load_numpy() is None:
+            print(f"{backend:9} skipped, NumPy is not installed")
+            continue
+        count, seconds = run_perft(backend, position, who, args.depth)
+        counts.add(count)
+        status = "" if expected is None else " ok" if count == expected else f" WRONG, expected {expected}"
+        failed = failed or (expected is not None and count != expected)
+        rate = f"{count / seconds:14,.0f} positions/s" if seconds > 0 else ""
+        print(f"{backend:9} perft({args.depth}) = {count:<10} {seconds:8.3f} s {rate}{status}")
+    if len(counts) > 1:
+        print("the backends disagree")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# Sampling profiler for agent moves
+#
+# A ProfiledAgent wraps any agent and samples the call stack of every select_move: while
+# a move is being chosen a background thread wakes every INTERVAL seconds, looks at the
+# frames of the thread choosing the move and counts the stack it finds. Between moves the
+# thread sleeps, and the agent itself runs unchanged, so the cost is a few stack walks per
+# millisecond of thinking. The samples of many moves and games (and of the worker
+# processes of a tournament) add up in a Profile, which can be written as
+#
+#   collapsed stacks   one "frame;frame;frame count" line per stack, the input of
+#                      flamegraph.pl and of most flame graph viewers
+#   speedscope         a JSON file for https://www.speedscope.app, one profile per agent
+#
+# From the tournament runner:
+#
+#   python -m core.tournament long short --games 20 --profile moves.folded
+#   python -m core.tournament long short --games 20 --profile moves.json --profile-format speedscope
+#
+# The stack is only read between bytecodes of the profiled thread, which holds the GIL, so
+# the samples come at most every sys.getswitchinterval() seconds (5 ms by default).
+
+import os
+import sys
+import threading
+import time
+
+INTERVAL = 0.001  # seconds between two samples of a move
+
+
+class Profile:
+    """
+    Stack samples of the moves of one agent.
+    """
+
+    def __init__(self):
+        self.samples = {}  # stack (tuple of (name, file, line) frames, outermost first): number of samples
+        self.moves = 0  # moves profiled
+        self.seconds = 0.0  # time spent in those moves
+
+    def merge(self, other):
+        """
+        Function to add the samples of another profile, for example from another process.
+
+        Args:
+            other (Profile): Samples to add.
+        """
+        for stack, count in other.samples.items():
+            self.samples[stack] = self.samples.get(stack, 0) + count
+        self.moves += other.moves
+        self.seconds += other.seconds
+
+    def seconds_per_sample(self):
+        """
+        Function to work out how much time one sample stands for.
+
+        Returns: The time of the profiled moves spread evenly over the samples, or 0 without samples.
+        """
+        total = sum(self.samples.values())
+        return self.seconds / total if total else 0.0
+
+    def top(self, count=10):
+        """
+        Function to find the functions the moves spent most time in.
+
+        Args:
+            count (int): Number of functions to return.
+
+        Returns: List of (frame name, self fraction, total fraction) sorted by self time, where
+            self counts the samples in the function itself and total also those in the functions it called.
+        """
+        total = sum(self.samples.values())
+        own, inside = {}, {}
+        for stack, samples in self.samples.items():
+            if not stack:
+                continue
+            leaf = frame_name(stack[-1])
+            own[leaf] = own.get(leaf, 0) + samples
+            for name in set(frame_name(frame) for frame in stack):
+                inside[name] = inside.get(name, 0) + samples
+        ordered = sorted(own.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [(name, samples / total, inside[name] / total) for name, samples in ordered]
+
+
+def frame_name(frame):
+    """
+    Function to name a stack frame the way the collapsed stack format shows it.
+
+    Args:
+        frame (tuple): (function name, file, first line of the function).
+
+    Returns: The name, e.g. "Searcher.alphabeta (search.py:129)".
+    """
+    name, path, line = frame
+    return f"{name} ({os.path.basename(path)}:{line})"
+
+
+class Sampler:
+    """
+    Background thread that samples the stack of the thread choosing a move.
+    """
+
+    def __init__(self, interval=INTERVAL):
+        """
+        Args:
+            interval (float): Seconds between two samples.
+        """
+        self.interval = interval
+        self.profile = Profile()
+        self.target = None  # (thread id, frame the move was started from) while a move is profiled
+        self.start_time = 0.0
+        self.active = threading.Event()  # set while a move is profiled, the thread sleeps otherwise
+        self.closed = False
+        self.thread = None  # started on the first move
+
+    def start_move(self, frame):
+        """
+        Function to start sampling the calling thread.
+
+        Args:
+            frame (frame): Frame of the caller; only the frames it called are counted.
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="move sampler", daemon=True)
+            self.thread.start()
+        self.target = (threading.get_ident(), frame)
+        self.start_time = time.perf_counter()
+        self.active.set()
+
+    def end_move(self):
+        """
+        Function to stop sampling after a move.
+        """
+        self.active.clear()
+        self.target = None
+        self.profile.moves += 1
+        self.profile.seconds += time.perf_counter() - self.start_time
+
+    def run(self):
+        """
+        Function run by the sampling thread.
+        """
+        samples = self.profile.samples
+        while not self.closed:
+            self.active.wait()
+            time.sleep(self.interval)
+            target = self.target
+            if target is None:
+                continue
+            thread_id, outer = target
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and frame is not outer:
+                code = frame.f_code
+                stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if frame is None or self.target is not target:
+                continue  # the move ended while the stack was read
+            stack = tuple(reversed(stack))
+            samples[stack] = samples.get(stack, 0) + 1
+
+    def close(self):
+        """
+        Function to end the sampling thread. The profile can be read safely afterwards.
+        """
+        self.closed = True
+        self.active.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class ProfiledAgent:
+    """
+    Agent wrapper that samples every select_move of the agent it wraps.
+    """
+
+    def __init__(self, agent, interval=INTERVAL):
+        """
+        Args:
+            agent (Agent): The agent to profile.
+            interval (float): Seconds between two samples.
+        """
+        self.agent = agent
+        self.name = agent.name
+        self.sampler = Sampler(interval)
+
+    @property
+    def profile(self):
+        return self.sampler.profile
+
+    def new_game(self, seed=None):
+        """
+        Function called before every game, passed on to the wrapped agent.
+
+        Args:
+            seed (int): If given, the random number generator is reseeded so the game can be replayed.
+        """
+        self.agent.new_game(seed)
+
+    def select_move(self, position, who, budget=None):
+        """
+        Function to let the wrapped agent choose a column while its stack is sampled.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player's number (1 or 2).
+            budget (float): Seconds to think for this move, or None for the agent's time limit.
+
+        Returns: column where player should put their piece.
+        """
+        self.sampler.start_move(sys._getframe())
+        try:
+            return self.agent.select_move(position, who, budget)
+        finally:
+            self.sampler.end_move()
+
+    def stop(self):
+        """
+        Function to ask a select_move running on another thread to return as soon as it can.
+        """
+        self.agent.stop()
+
+    def close(self):
+        """
+        Function to end the sampling thread and close the wrapped agent.
+        """
+        self.sampler.close()
+        self.agent.close()
+
+
+def collapsed_stacks(profiles):
+    """
+    Function to write profiles in the collapsed stack format.
+
+    Args:
+        profiles (list): (agent name, Profile) pairs; the name becomes the outermost frame.
+
+    Returns: The text, one "frame;frame;frame count" line per stack.
+    """
+    lines = []
+    for name, profile in profiles:
+        for stack, count in sorted(profile.samples.items()):
+            frames = ";".join([name] + [frame_name(frame).replace(";", ":") for frame in stack])
+            lines.append(f"{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def speedscope(profiles, title="Connect 4 moves"):
+    """
+    Function to write profiles in the speedscope file format, one sampled profile per agent.
+    Sample weights are in seconds, the time of the moves spread over their samples.
+
+    Args:
+        profiles (list): (agent name, Profile) pairs.
+        title (str): Name of the whole file.
+
+    Returns: The JSON text.
+    """
+    import json  # only needed when the profile is written
+    frames = []
+    index = {}
+    documents = []
+    for name, profile in profiles:
+        weight = profile.seconds_per_sample()
+        samples, weights = [], []
+        for stack, count in sorted(profile.samples.items()):
+            indices = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(index[frame])
+            samples.append(indices)
+            weights.append(count * weight)
+        documents.append({"type": "sampled", "name": f"{name} ({profile.moves} moves)", "unit": "seconds",
+                          "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights})
+    return json.dumps({"$schema": "https://www.speedscope.app/file-format-schema.json",
+                       "shared": {"frames": frames}, "profiles": documents, "name": title,
+                       "activeProfileIndex": 0, "exporter": "core.profiling"})
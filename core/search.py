@@ -0,0 +1,326 @@
+# Minimax search with alpha-beta pruning on bitboard positions
+#
+# Player 2 (the AI in the scripts) is the maximizing player, exactly like minimax in
+# longTermAgent.py, so scores can be compared with the ones the scripts print.
+
+import math
+import time
+
+from core.bitboard import NUM_COLS, NUM_ROWS, mirror_move
+from core.evaluate import Evaluator
+from core.transposition import EXACT, LOWER, UPPER
+
+WIN_SCORE = 1000000000  # score of a position won by player 2 (negated for player 1)
+MAXIMIZING_KEY = 0x9E3779B97F4A7C15  # mixed into the hash when player 2 is to move
+CHECK_EVERY = 256  # number of nodes between two looks at the clock
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time or node budget has run out.
+    """
+
+
+def terminal_score(position):
+    """
+    Function to score a position where the game is already over.
+
+    Args:
+        position (Position): current state of the game board.
+
+    Returns: -WIN_SCORE or WIN_SCORE if player 1 or 2 has won, 0 for a full board, None if the game goes on.
+    """
+    if position.has_won(1):
+        return -WIN_SCORE
+    if position.has_won(2):
+        return WIN_SCORE
+    if position.is_full():
+        return 0
+    return None
+
+
+class Searcher:
+    """
+    Alpha-beta search that keeps its transposition table and budget between calls.
+    """
+
+    def __init__(self, table=None, time_limit=None, node_limit=None, orderer=None, stats=None):
+        """
+        Args:
+            table (TranspositionTable): Optional table used to reuse results of transposed positions.
+            time_limit (float): Seconds the search may run for, or None for no limit.
+            node_limit (int): Number of nodes the search may visit, or None for no limit.
+            orderer (StaticOrderer): Optional move orderer, otherwise moves are tried left to right.
+            stats (SearchStats): Optional collector of node counts, cutoffs and timings (see core.stats).
+        """
+        self.table = table
+        self.orderer = orderer
+        self.stats = stats
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.deadline = None
+        self.stopped = False  # set by stop to end the search early
+        self.nodes = 0  # nodes visited since the budget was last reset
+        self.cutoffs = 0  # nodes where the rest of the moves were pruned
+        self.root_move = None  # column to try first at the root
+        self.evaluator = None  # keeps the heuristic score of the searched position up to date
+
+    def start_budget(self):
+        """
+        Function to start counting time and nodes against the limits.
+        """
+        self.nodes = 0
+        self.cutoffs = 0
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+
+    def out_of_budget(self):
+        """
+        Function to check if the time or node limit has been used up.
+
+        Returns: True if the search should stop, False otherwise.
+        """
+        if self.stopped:
+            return True
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def stop(self):
+        """
+        Function to make an iterative deepening search running on another thread return as
+        soon as it can, with the result of the deepest iteration that finished.
+        """
+        self.stopped = True
+
+    def minimax(self, position, depth, alpha, beta, maximizingPlayer, enforce=False):
+        """
+        Implements the minimax algorithm with alpha-beta pruning to determine the best move for a player.
+
+        Args:
+            position (Position): current state of the game board.
+            depth (int): The depth of the search tree for the minimax algorithm.
+            alpha (float): The best value that the maximizing player currently can guarantee.
+            beta (float): The best value that the minimizing player currently can guarantee.
+            maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+            enforce (bool): Raise SearchTimeout when the budget (see start_budget) runs out. The
+                position is then left with pieces of the search on it.
+
+        Returns: A tuple containing the best column for the current player and the corresponding score.
+        """
+        score = terminal_score(position)
+        if score is not None:
+            return (None, score)
+        self.evaluator = Evaluator(position)
+        stats = self.stats
+        if stats is None:
+            return self.alphabeta(position, depth, alpha, beta, maximizingPlayer, enforce)
+        stats.start_search()
+        stats.start_iteration(self, depth)
+        try:
+            result = self.alphabeta(position, depth, alpha, beta, maximizingPlayer, enforce)
+        except SearchTimeout:
+            stats.end_iteration(self, False)
+            stats.end_search(0)
+            raise
+        stats.end_iteration(self, True)
+        stats.end_search(depth)
+        return result
+
+    def alphabeta(self, position, depth, alpha, beta, maximizingPlayer, enforce=False):
+        """
+        Function to search one node of the tree. Used by minimax and iterative_deepening.
+
+        Moves are made and undone on the position itself, so it is left unchanged when the
+        search returns normally. self.evaluator has to follow the same position.
+        Wins are found when a move is made, so the node itself must not be won already.
+
+        Args:
+            position (Position): current state of the game board.
+            depth (int): The depth of the search tree for the minimax algorithm.
+            alpha (float): The best value that the maximizing player currently can guarantee.
+            beta (float): The best value that the minimizing player currently can guarantee.
+            maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+            enforce (bool): Raise SearchTimeout when the budget runs out.
+
+        Returns: A tuple containing the best column for the current player and the corresponding score.
+        """
+        self.nodes += 1
+        if enforce and self.nodes % CHECK_EVERY == 0 and self.out_of_budget():
+            raise SearchTimeout()
+        stats = self.stats
+        if stats is not None:
+            stats.visit(depth)
+
+        if position.is_full():
+            return (None, 0)
+        if depth == 0:
+            if stats is not None:
+                stats.leaves += 1
+            return (None, self.evaluator.scores[1])  # score_pos(position, 2)
+
+        table = self.table
+        key = 0
+        mirrored = False
+        hint = self.root_move
+        self.root_move = None
+        if table is not None:
+            # a position and its mirror image share an entry, keyed by the canonical hash
+            key, mirrored = position.canonical_hash()
+            if maximizingPlayer:
+                key ^= MAXIMIZING_KEY
+            entry = table.lookup(key)
+            if entry is not None and entry[1] >= depth:
+                bound, score, move = entry[2], entry[3], entry[4]
+                if mirrored:
+                    move = mirror_move(move)
+                if bound == EXACT:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return (move, score)
+                if bound == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return (move, score)
+            if hint is None and entry is not None:
+                hint = mirror_move(entry[4]) if mirrored else entry[4]
+        alpha_orig, beta_orig = alpha, beta
+
+        who = 2 if maximizingPlayer else 1
+        moves = position.valid_moves()
+        if self.orderer is not None:
+            moves = self.orderer.order(moves, position.count, who, hint)
+        elif hint in moves:
+            # best move found earlier goes first, so the rest is cut sooner
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        evaluator = self.evaluator
+        column = None
+        value = -math.inf if maximizingPlayer else math.inf
+        win_score = WIN_SCORE if maximizingPlayer else -WIN_SCORE
+        for col in moves:
+            if position.is_winning_move(col, who):
+                new_score = win_score  # only the player who moves can make 4 in a line
+            else:
+                evaluator.play(position, col, who)
+                new_score = self.alphabeta(position, depth - 1, alpha, beta, not maximizingPlayer, enforce)[1]
+                evaluator.undo(position, col, who)
+            if maximizingPlayer:
+                if new_score > value:
+                    value = new_score
+                    column = col
+                alpha = max(alpha, value)
+            else:
+                if new_score < value:
+                    value = new_score
+                    column = col
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.cutoffs += 1
+                if stats is not None:
+                    stats.cutoff(moves.index(col))
+                if self.orderer is not None:
+                    self.orderer.record_cutoff(col, position.count, who, depth)
+                break
+
+        if table is not None:
+            if value <= alpha_orig:
+                bound = UPPER
+            elif value >= beta_orig:
+                bound = LOWER
+            else:
+                bound = EXACT
+            table.store(key, depth, bound, value, mirror_move(column) if mirrored else column)
+        return (column, value)
+
+    def iterative_deepening(self, position, max_depth=None, maximizingPlayer=True):
+        """
+        Function to search depth 1, 2, 3, ... until the budget runs out.
+
+        The first iteration always runs to completion so that there is a move to return.
+        Each later iteration starts with the best move of the one before.
+
+        Args:
+            position (Position): current state of the game board.
+            max_depth (int): Deepest iteration to run, or None to go until the board is full.
+            maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+
+        Returns: A tuple (column, score, depth) from the last iteration that finished.
+        """
+        score = terminal_score(position)
+        if score is not None:
+            # the game is already over, any legal move will do
+            return (position.valid_moves()[0] if not position.is_full() else None, score, 0)
+        position = position.copy()  # an aborted iteration leaves pieces behind
+        empty = NUM_ROWS * NUM_COLS - position.count
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        self.start_budget()
+        self.evaluator = Evaluator(position)
+        stats = self.stats
+        if stats is not None:
+            stats.start_search()
+        column, value, reached = None, 0, 0
+        for depth in range(1, max(1, max_depth) + 1):
+            self.root_move = column
+            if stats is not None:
+                stats.start_iteration(self, depth)
+            try:
+                result = self.alphabeta(position, depth, -math.inf, math.inf, maximizingPlayer, depth > 1)
+            except SearchTimeout:
+                if stats is not None:
+                    stats.end_iteration(self, False)
+                break
+            finally:
+                self.root_move = None
+            if stats is not None:
+                stats.end_iteration(self, True)
+            column, value, reached = result[0], result[1], depth
+            if abs(value) >= WIN_SCORE or self.out_of_budget():
+                break  # the game is decided, or there is no time for a deeper iteration
+        if stats is not None:
+            stats.end_search(reached)
+        return (column, value, reached)
+
+
+def minimax(position, depth, alpha, beta, maximizingPlayer, table=None, orderer=None, stats=None):
+    """
+    Implements the minimax algorithm with alpha-beta pruning to determine the best move for a player.
+
+    Args:
+        position (Position): current state of the game board.
+        depth (int): The depth of the search tree for the minimax algorithm.
+        alpha (float): The best value that the maximizing player currently can guarantee.
+        beta (float): The best value that the minimizing player currently can guarantee.
+        maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+        table (TranspositionTable): Optional table used to reuse results of transposed positions.
+        orderer (StaticOrderer): Optional move orderer, otherwise moves are tried left to right.
+        stats (SearchStats): Optional collector of node counts, cutoffs and timings (see core.stats).
+
+    Returns: A tuple containing the best column for the current player and the corresponding score.
+    """
+    return Searcher(table, orderer=orderer, stats=stats).minimax(position, depth, alpha, beta, maximizingPlayer)
+
+
+def iterative_deepening(position, time_limit=None, node_limit=None, max_depth=None, table=None, orderer=None,
+                        maximizingPlayer=True, stats=None):
+    """
+    Function to search deeper and deeper until a time or node limit runs out.
+
+    Args:
+        position (Position): current state of the game board.
+        time_limit (float): Seconds the search may run for, or None for no limit.
+        node_limit (int): Number of nodes the search may visit, or None for no limit.
+        max_depth (int): Deepest iteration to run, or None to go until the board is full.
+        table (TranspositionTable): Optional table used to reuse results of transposed positions.
+        orderer (StaticOrderer): Optional move orderer, otherwise moves are tried left to right.
+        maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+        stats (SearchStats): Optional collector of node counts, cutoffs and timings (see core.stats).
+
+    Returns: A tuple (column, score, depth) from the last iteration that finished.
+    """
+    searcher = Searcher(table, time_limit, node_limit, orderer, stats)
+    return searcher.iterative_deepening(position, max_depth, maximizingPlayer)
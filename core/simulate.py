@@ -0,0 +1,154 @@
+# Vectorized random game simulator
+#
+# Plays thousands of random games in lockstep with NumPy. Every game is a pair of
+# bitboards (same layout as core.bitboard) held in uint64 arrays, so one ply of all the
+# games is a handful of array operations:
+#
+#   legal moves  heights < NUM_ROWS for every column
+#   drop         OR the bit at column * COL_BITS + height into the mover's board
+#   win check    the shift-and-AND test of core.bitboard.four_in_a_row on whole arrays
+#
+# NumPy is only needed for this module. Run it with
+#
+#   python -m core.simulate --games 1000000
+
+import time
+
+from core.bitboard import COL_BITS, DIAGONAL_DOWN, DIAGONAL_UP, HORIZONTAL, NUM_COLS, NUM_ROWS, VERTICAL
+
+np = None  # NumPy, imported by load_numpy the first time it is needed (it takes longer than the whole engine)
+
+
+def load_numpy():
+    """
+    Function to import NumPy on first use.
+
+    Returns: The numpy module, or None if it is not installed (the rest of the engine works without it).
+    """
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+def require_numpy():
+    """
+    Function to import NumPy, failing with a clear message when it is not installed.
+    """
+    if load_numpy() is None:
+        raise ImportError("core.simulate needs NumPy, install it with 'pip install numpy'")
+
+
+def four_in_a_row(bits):
+    """
+    Function to check many bitmaps for four set bits in a line.
+
+    Args:
+        bits (numpy.ndarray): uint64 bitmaps, one per game.
+
+    Returns: Boolean array, True where the bitmap has 4 pieces in a line.
+    """
+    won = np.zeros(bits.shape, dtype=bool)
+    for shift in (VERTICAL, HORIZONTAL, DIAGONAL_UP, DIAGONAL_DOWN):
+        pairs = bits & (bits >> np.uint64(shift))
+        won |= (pairs & (pairs >> np.uint64(2 * shift))) != 0
+    return won
+
+
+def random_playouts(mover, other, heights, rng):
+    """
+    Function to finish many games by playing random legal moves for both sides.
+
+    Args:
+        mover (numpy.ndarray): uint64 bitmaps of the player to move in each game.
+        other (numpy.ndarray): uint64 bitmaps of the other player in each game.
+        heights (numpy.ndarray): Pieces per column, shape (games, NUM_COLS).
+        rng (numpy.random.Generator): Source of the random moves.
+
+    Returns: A tuple (result, plies). result is 1 where the player to move at the start
+        won, -1 where the other player won and 0 for a draw. plies is the number of moves
+        played in each game. The input arrays are not changed.
+    """
+    require_numpy()
+    mover = mover.astype(np.uint64)
+    other = other.astype(np.uint64)
+    heights = heights.astype(np.int64)
+    games = len(mover)
+    rows = np.arange(games)
+    result = np.zeros(games, dtype=np.int8)
+    plies = np.zeros(games, dtype=np.int16)
+    active = ~(four_in_a_row(mover) | four_in_a_row(other))
+    sign = 1  # +1 while the starting player moves, -1 for the opponent
+
+    for ply in range(NUM_ROWS * NUM_COLS):
+        legal = heights < NUM_ROWS
+        active &= legal.any(axis=1)  # a full board is a draw
+        if not active.any():
+            break
+        # random legal column per game: highest random number among the legal columns
+        choice = np.where(legal, rng.random((games, NUM_COLS)), -1.0).argmax(axis=1)
+        index = choice * COL_BITS + heights[rows, choice]
+        drop = np.where(active, np.left_shift(np.uint64(1), index.astype(np.uint64)), np.uint64(0))
+        mover |= drop
+        heights[rows, choice] += active
+        plies += active
+
+        won = active & four_in_a_row(mover)
+        result[won] = sign
+        active &= ~won
+        mover, other = other, mover
+        sign = -sign
+    return result, plies
+
+
+def simulate_random_games(games, seed=None):
+    """
+    Function to play random games from the empty board.
+
+    Args:
+        games (int): Number of games to play.
+        seed (int): Seed for the random moves.
+
+    Returns: A tuple (winners, plies) of arrays: the winner of each game (1, 2 or 0 for a draw)
+        and the number of moves it lasted.
+    """
+    require_numpy()
+    rng = np.random.default_rng(seed)
+    empty = np.zeros(games, dtype=np.uint64)
+    result, plies = random_playouts(empty, empty, np.zeros((games, NUM_COLS), dtype=np.int64), rng)
+    winners = np.where(result == 1, 1, np.where(result == -1, 2, 0))
+    return winners, plies
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+
+    parser = argparse.ArgumentParser(description="Play random Connect 4 games in bulk with NumPy.")
+    parser.add_argument("--games", type=int, default=1000000, help="number of games to play")
+    parser.add_argument("--batch", type=int, default=100000, help="number of games played in lockstep")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random moves")
+    args = parser.parse_args(argv)
+
+    require_numpy()
+    counts = [0, 0, 0]  # draws, wins of player 1, wins of player 2
+    total_plies = 0
+    start_time = time.perf_counter()
+    for first in range(0, args.games, args.batch):
+        seed = None if args.seed is None else args.seed + first
+        winners, plies = simulate_random_games(min(args.batch, args.games - first), seed)
+        for who in range(3):
+            counts[who] += int((winners == who).sum())
+        total_plies += int(plies.sum())
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{args.games} random games: player 1 won {counts[1]}, player 2 won {counts[2]}, {counts[0]} draws")
+    print(f"average length {total_plies / args.games:.2f} moves, "
+          f"{args.games / elapsed:,.0f} games per second ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
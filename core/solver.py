@@ -0,0 +1,344 @@
+# Perfect play solver
+#
+# Works out the exact game-theoretic value of a position, in the style of Pascal Pons'
+# Connect 4 solver: negamax with alpha-beta, a transposition table, centre-first and
+# threat-first move ordering, moves that hand the opponent a win are never tried
+# (anticipation of losing moves), and the score itself is found by repeated null-window
+# searches that narrow it down (a bisection like MTD(f)).
+#
+# Positions are kept as two integers using the layout of core.bitboard:
+#   current  the pieces of the player to move
+#   mask     every piece on the board
+#
+# A score is positive if the player to move can force a win, negative if the opponent
+# can, and 0 for a draw. Its size tells how fast: the winner wins with their
+# (SCORE_BASE - |score|)-th piece, so a quicker win has a bigger score.
+
+import time
+
+from core.bitboard import COL_BITS, NUM_COLS, NUM_ROWS, Position, canonical_key
+from core.ordering import CENTRE_ORDER
+
+CELLS = NUM_ROWS * NUM_COLS
+SCORE_BASE = CELLS // 2 + 1  # 22 on a 6x7 board
+MIN_SCORE = -(CELLS // 2) + 3
+MAX_SCORE = (CELLS + 1) // 2 - 3
+
+BOTTOM_MASK = sum(1 << (c * COL_BITS) for c in range(NUM_COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << NUM_ROWS) - 1)
+COLUMN_MASKS = [((1 << NUM_ROWS) - 1) << (c * COL_BITS) for c in range(NUM_COLS)]
+
+TABLE_SIZE = (1 << 20) + 7  # slots in the solver's transposition table (a prime)
+CHECK_EVERY = 1024  # number of nodes between two looks at the clock
+
+
+class SolverAborted(Exception):
+    """
+    Raised when a solve runs over its node or time limit.
+    """
+
+
+def winning_cells(current, mask):
+    """
+    Function to find the empty cells that would complete 4 in a line for a player.
+
+    Args:
+        current (int): Bitmap of the player's pieces.
+        mask (int): Bitmap of every piece on the board.
+
+    Returns: Bitmap of the cells (reachable or not) where the player would win.
+    """
+    # vertical
+    r = (current << 1) & (current << 2) & (current << 3)
+    for shift in (COL_BITS, COL_BITS - 1, COL_BITS + 1):  # horizontal and both diagonals
+        p = (current << shift) & (current << 2 * shift)
+        r |= p & (current << 3 * shift)
+        r |= p & (current >> shift)
+        p = (current >> shift) & (current >> 2 * shift)
+        r |= p & (current << shift)
+        r |= p & (current >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def non_losing_moves(current, mask):
+    """
+    Function to list the moves that do not let the opponent win straight away.
+
+    Args:
+        current (int): Bitmap of the pieces of the player to move.
+        mask (int): Bitmap of every piece on the board.
+
+    Returns: Bitmap with the cell of each such move, 0 if every move loses.
+    """
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    opponent_win = winning_cells(current ^ mask, mask)
+    forced = possible & opponent_win
+    if forced:
+        if forced & (forced - 1):
+            return 0  # the opponent has two threats, only one can be blocked
+        possible = forced
+    return possible & ~(opponent_win >> 1)  # never play right below an opponent's winning cell
+
+
+class Solver:
+    """
+    Exact solver with its own transposition table, which is kept between solves.
+    """
+
+    def __init__(self, node_limit=None, time_limit=None):
+        """
+        Args:
+            node_limit (int): Number of nodes one solve may visit before SolverAborted is raised, or None.
+            time_limit (float): Seconds one solve may run for before SolverAborted is raised, or None.
+        """
+        self.keys = [-1] * TABLE_SIZE  # -1 for an empty slot, as 0 is the key of the empty board
+        self.values = [0] * TABLE_SIZE
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.deadline = None
+        self.stopped = False  # set by stop to end the solve early
+        self.nodes = 0
+
+    def start_budget(self, time_limit=None):
+        """
+        Function to start counting nodes and time against the limits.
+
+        Args:
+            time_limit (float): Seconds for this solve, or None for the solver's own time limit.
+        """
+        self.nodes = 0
+        self.stopped = False
+        if time_limit is None:
+            time_limit = self.time_limit
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def stop(self):
+        """
+        Function to make a solve running on another thread raise SolverAborted as soon as it can.
+        """
+        self.stopped = True
+
+    def out_of_time(self):
+        """
+        Function to check if the solve was stopped or its time is up.
+
+        Returns: True if the solve should give up, False otherwise.
+        """
+        return self.stopped or self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        """
+        Function to search a position with alpha-beta.
+
+        Args:
+            current (int): Bitmap of the pieces of the player to move.
+            mask (int): Bitmap of every piece on the board.
+            moves (int): Number of pieces on the board.
+            alpha (int): Lower end of the score window.
+            beta (int): Upper end of the score window.
+
+        Returns: The exact score if it is inside the window, otherwise a bound on the side it fell out.
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SolverAborted()
+        if self.nodes % CHECK_EVERY == 0 and self.out_of_time():
+            raise SolverAborted()
+
+        candidates = non_losing_moves(current, mask)
+        if not candidates:
+            return -((CELLS - moves) // 2)  # every move lets the opponent win next turn
+        if moves >= CELLS - 2:
+            return 0  # nobody can win with the last two pieces
+
+        low = -((CELLS - 2 - moves) // 2)  # the opponent cannot win on their next move
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (CELLS - 1 - moves) // 2  # we cannot win on this move
+        key = canonical_key(current + mask)[0]  # a position and its mirror image share a slot
+        slot = key % TABLE_SIZE
+        if self.keys[slot] == key:
+            high = self.values[slot] + MIN_SCORE - 1  # stored upper bound
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # moves that create the most threats first, centre first among equals
+        ordered = []
+        for col in CENTRE_ORDER:
+            move = candidates & COLUMN_MASKS[col]
+            if move:
+                threats = winning_cells(current | move, mask).bit_count()
+                ordered.append((-threats, len(ordered), move))
+        ordered.sort()
+
+        opponent = current ^ mask
+        for threats, order, move in ordered:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.keys[slot] = key
+        self.values[slot] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def solve(self, current, mask, moves):
+        """
+        Function to find the exact score of a position with null-window searches.
+
+        Args:
+            current (int): Bitmap of the pieces of the player to move.
+            mask (int): Bitmap of every piece on the board.
+            moves (int): Number of pieces on the board.
+
+        Returns: The score of the position.
+        """
+        self.start_budget()
+        return self.bisect(current, mask, moves)
+
+    def bisect(self, current, mask, moves):
+        """
+        Function to narrow the score of a position down with null-window searches. Used by
+        solve and analyse, which start the budget first.
+
+        Args:
+            current (int): Bitmap of the pieces of the player to move.
+            mask (int): Bitmap of every piece on the board.
+            moves (int): Number of pieces on the board.
+
+        Returns: The score of the position.
+        """
+        if winning_cells(current, mask) & (mask + BOTTOM_MASK) & BOARD_MASK:
+            return (CELLS + 1 - moves) // 2  # win with the next piece
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        while low < high:
+            # aim the window at the middle, but try "win or not" / "lose or not" first
+            med = low + (high - low) // 2
+            if med <= 0 and -(-low // 2) < med:
+                med = -(-low // 2)  # half way to low, rounded towards 0
+            elif med >= 0 and high // 2 > med:
+                med = high // 2
+            score = self.negamax(current, mask, moves, med, med + 1)
+            if score <= med:
+                high = score
+            else:
+                low = score
+        return low
+
+    def solve_position(self, position, who):
+        """
+        Function to find the exact score of a position.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player to move (1 or 2).
+
+        Returns: The score for the player to move.
+        """
+        return self.solve(position.bits[who - 1], position.bits[0] | position.bits[1], position.count)
+
+    def analyse(self, position, who, time_limit=None):
+        """
+        Function to score every legal move of a position.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player to move (1 or 2).
+            time_limit (float): Seconds for all the moves together, or None for the solver's own time limit.
+
+        Returns: Dict from column to the score of the move for the player making it.
+        """
+        current = position.bits[who - 1]
+        mask = position.bits[0] | position.bits[1]
+        self.start_budget(time_limit)  # the limits cover all the moves together
+        scores = {}
+        for col in position.valid_moves():
+            if position.is_winning_move(col, who):
+                scores[col] = (CELLS + 1 - position.count) // 2
+            else:
+                move = (mask + BOTTOM_MASK) & COLUMN_MASKS[col]
+                scores[col] = -self.bisect(current ^ mask, mask | move, position.count + 1)
+        return scores
+
+    def best_move(self, position, who, time_limit=None):
+        """
+        Function to pick a move with perfect play: the quickest win, else a draw, else the slowest loss.
+
+        Args:
+            position (Position): current state of the game board.
+            who (int): The player to move (1 or 2).
+            time_limit (float): Seconds to solve for, or None for the solver's own time limit.
+
+        Returns: A tuple (column, score). Among equal moves the one nearest the centre is chosen.
+        """
+        scores = self.analyse(position, who, time_limit)
+        best = max(scores.values())
+        column = next(col for col in CENTRE_ORDER if scores.get(col) == best)
+        return (column, best)
+
+
+def describe(score, moves):
+    """
+    Function to put a score into words.
+
+    Args:
+        score (int): Score for the player to move.
+        moves (int): Number of pieces on the board.
+
+    Returns: A tuple (outcome, plies): "win", "loss" or "draw", and how many more moves the game
+        lasts with perfect play (None for a draw).
+    """
+    if score == 0:
+        return ("draw", None)
+    if score > 0:
+        # the player to move has moves // 2 pieces and wins with piece number SCORE_BASE - score
+        return ("win", 2 * (SCORE_BASE - score - moves // 2) - 1)
+    return ("loss", 2 * (SCORE_BASE + score - (moves - moves // 2)))
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+
+    parser = argparse.ArgumentParser(description="Solve a Connect 4 position exactly.")
+    parser.add_argument("moves", nargs="?", default="", help="columns played so far, 1-7, e.g. 4435")
+    parser.add_argument("--nodes", type=int, default=None, help="give up after this many nodes")
+    parser.add_argument("--time", type=float, default=60.0,
+                        help="give up after this many seconds (default 60, 0 for no limit)")
+    args = parser.parse_args(argv)
+
+    position, who = Position(), 1
+    for move in args.moves:
+        col = int(move) - 1
+        if not 0 <= col < NUM_COLS or not position.can_play(col) or position.has_won(3 - who):
+            parser.error(f"cannot play {move} after {position.count} moves")
+        position.play(col, who)
+        who = 3 - who
+    if position.has_won(3 - who) or position.is_full():
+        print("the game is already over")
+        return
+
+    solver = Solver(args.nodes, args.time or None)
+    start_time = time.perf_counter()
+    try:
+        scores = solver.analyse(position, who)
+    except SolverAborted:
+        print(f"gave up after {solver.nodes} nodes ({time.perf_counter() - start_time:.2f} s), "
+              f"the position is too early in the game to solve in time")
+        return
+    elapsed = time.perf_counter() - start_time
+    for col in sorted(scores):
+        outcome, plies = describe(scores[col], position.count)
+        after = "" if plies is None else f" in {plies} moves"
+        print(f"column {col + 1}: score {scores[col]:+d}, {outcome}{after}")
+    column = next(col for col in CENTRE_ORDER if scores.get(col) == max(scores.values()))
+    print(f"best move: column {column + 1} ({solver.nodes} nodes, {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# Search statistics
+#
+# A SearchStats collector can be given to a core.search.Searcher (or a LongTermAgent with
+# stats=True) to see where the search spends its time:
+#
+#   nodes per ply      nodes visited at each distance from the root
+#   leaf evaluations   nodes scored with the heuristic at depth 0
+#   beta cutoffs       nodes where the rest of the moves were pruned, and which move
+#                      (first, second, ...) caused it; good move ordering cuts on the first
+#   table              transposition table probes, hits and nodes ended by a stored bound
+#   iterations         nodes and seconds of each iterative deepening depth, the effective
+#                      branching factor between depths, and how deep the searches got
+#
+# Only core.search.Searcher fills the counters: moves the perfect agent's exact solver
+# finds, and searches spread over worker processes (--search-workers), are not counted.
+# The counters add up over every search, so one collector can follow an agent through
+# many games. Without a collector the search only pays for a check of searcher.stats.
+# The results can be written as JSON or as Prometheus text:
+#
+#   python -m core.tournament long short --games 20 --stats stats.json
+#   python -m core.tournament long short --games 20 --stats stats.prom --stats-format prometheus
+
+import time
+
+from core.bitboard import NUM_COLS
+
+
+class SearchStats:
+    """
+    Counters filled in by the search, see the notes at the top of this module.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Function to set every counter back to zero.
+        """
+        self.searches = 0  # number of searches (moves) recorded
+        self.seconds = 0.0  # time spent in those searches
+        self.nodes = []  # nodes visited at each ply from the root
+        self.leaves = 0  # nodes scored with the heuristic
+        self.cutoffs = 0  # nodes where the rest of the moves were pruned
+        self.cutoff_index = [0] * NUM_COLS  # cutoffs caused by the first, second, ... move tried
+        self.tt_probes = 0  # transposition table lookups
+        self.tt_hits = 0  # lookups that found the position
+        self.tt_cutoffs = 0  # nodes answered by the stored score without searching
+        self.iterations = {}  # depth: [completed, aborted, nodes, seconds, aborted seconds]
+        self.depth_reached = {}  # deepest finished iteration: number of searches
+        self.root_depth = 0  # depth of the iteration being searched
+        self.search_start = None
+        self.iteration_start = None  # (time, nodes, probes, hits) when the iteration started
+
+    def start_search(self):
+        """
+        Function called when a search for a move starts.
+        """
+        self.search_start = time.perf_counter()
+
+    def end_search(self, reached):
+        """
+        Function called when a search for a move returns.
+
+        Args:
+            reached (int): Depth of the deepest iteration that finished.
+        """
+        self.searches += 1
+        self.seconds += time.perf_counter() - self.search_start
+        self.depth_reached[reached] = self.depth_reached.get(reached, 0) + 1
+
+    def start_iteration(self, searcher, depth):
+        """
+        Function called before the root of an iteration is searched.
+
+        Args:
+            searcher (Searcher): The search, to read its node count and table counters.
+            depth (int): Depth of the iteration.
+        """
+        self.root_depth = depth
+        if len(self.nodes) <= depth:
+            self.nodes.extend([0] * (depth + 1 - len(self.nodes)))
+        table = searcher.table
+        self.iteration_start = (time.perf_counter(), searcher.nodes,
+                                0 if table is None else table.probes, 0 if table is None else table.hits)
+
+    def end_iteration(self, searcher, completed):
+        """
+        Function called when an iteration has finished or was stopped by the budget.
+
+        Args:
+            searcher (Searcher): The search, to read its node count and table counters.
+            completed (bool): False if the iteration was stopped before it finished.
+        """
+        start_time, nodes, probes, hits = self.iteration_start
+        seconds = time.perf_counter() - start_time
+        table = searcher.table
+        if table is not None:
+            self.tt_probes += table.probes - probes
+            self.tt_hits += table.hits - hits
+        record = self.iterations.setdefault(self.root_depth, [0, 0, 0, 0.0, 0.0])
+        if completed:
+            record[0] += 1
+            record[2] += searcher.nodes - nodes
+            record[3] += seconds
+        else:
+            record[1] += 1
+            record[4] += seconds
+
+    def visit(self, depth):
+        """
+        Function called for every node.
+
+        Args:
+            depth (int): Depth left to search from the node.
+        """
+        self.nodes[self.root_depth - depth] += 1
+
+    def cutoff(self, index):
+        """
+        Function called when a move causes a beta cutoff.
+
+        Args:
+            index (int): Position of the move in the order the moves were tried, 0 for the first.
+        """
+        self.cutoffs += 1
+        self.cutoff_index[index] += 1
+
+    def merge(self, other):
+        """
+        Function to add the counters of another collector, for example from another process.
+
+        Args:
+            other (SearchStats): Counters to add.
+        """
+        self.searches += other.searches
+        self.seconds += other.seconds
+        if len(self.nodes) < len(other.nodes):
+            self.nodes.extend([0] * (len(other.nodes) - len(self.nodes)))
+        for ply, count in enumerate(other.nodes):
+            self.nodes[ply] += count
+        self.leaves += other.leaves
+        self.cutoffs += other.cutoffs
+        self.cutoff_index = [a + b for a, b in zip(self.cutoff_index, other.cutoff_index)]
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.tt_cutoffs += other.tt_cutoffs
+        for depth, record in other.iterations.items():
+            mine = self.iterations.setdefault(depth, [0, 0, 0, 0.0, 0.0])
+            self.iterations[depth] = [a + b for a, b in zip(mine, record)]
+        for depth, count in other.depth_reached.items():
+            self.depth_reached[depth] = self.depth_reached.get(depth, 0) + count
+
+    def iteration_rows(self):
+        """
+        Function to sum up the iterations of every depth.
+
+        Returns: List of dicts, one per depth in increasing order, with the number of completed
+            and aborted iterations, their nodes and seconds, the mean nodes and seconds of a
+            completed iteration, and the effective branching factor: mean nodes of this depth
+            over mean nodes of the depth before (None for the first depth).
+        """
+        rows = []
+        previous = None
+        for depth in sorted(self.iterations):
+            completed, aborted, nodes, seconds, aborted_seconds = self.iterations[depth]
+            mean_nodes = nodes / completed if completed else None
+            branching = mean_nodes / previous if mean_nodes and previous else None
+            rows.append({"depth": depth, "completed": completed, "aborted": aborted, "nodes": nodes,
+                         "seconds": seconds, "aborted_seconds": aborted_seconds, "mean_nodes": mean_nodes,
+                         "mean_seconds": seconds / completed if completed else None, "branching_factor": branching})
+            previous = mean_nodes
+        return rows
+
+    def to_dict(self):
+        """
+        Function to collect the statistics in plain Python types.
+
+        Returns: Dict that json.dump can write.
+        """
+        total = sum(self.nodes)
+        return {
+            "searches": self.searches,
+            "seconds": self.seconds,
+            "nodes": total,
+            "nodes_per_second": total / self.seconds if self.seconds > 0 else None,
+            "nodes_per_ply": list(self.nodes),
+            "leaf_evaluations": self.leaves,
+            "beta_cutoffs": self.cutoffs,
+            "cutoff_move_index": list(self.cutoff_index),
+            "first_move_cutoff_rate": self.cutoff_index[0] / self.cutoffs if self.cutoffs else None,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_hit_rate": self.tt_hits / self.tt_probes if self.tt_probes else None,
+            "tt_cutoffs": self.tt_cutoffs,
+            "depth_reached": {str(depth): count for depth, count in sorted(self.depth_reached.items())},
+            "iterations": self.iteration_rows(),
+        }
+
+    def to_json(self):
+        """
+        Function to write the statistics as JSON.
+
+        Returns: The JSON text.
+        """
+        import json  # only needed when the statistics are written
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix="connect4_search", labels=None):
+        """
+        Function to write the statistics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Start of every metric name.
+            labels (dict): Labels added to every sample, for example {"agent": "long"}.
+
+        Returns: The text, one sample per line.
+        """
+        return "\n".join(prometheus_lines([(self, labels or {})], prefix)) + "\n"
+
+
+def prometheus_lines(collectors, prefix="connect4_search"):
+    """
+    Function to write several collectors as one Prometheus text, each metric family once.
+
+    Args:
+        collectors (list): (SearchStats, labels dict) pairs.
+        prefix (str): Start of every metric name.
+
+    Returns: List of lines.
+    """
+    families = [
+        ("searches_total", "counter", "Searches run, one per move.",
+         lambda s: [({}, s.searches)]),
+        ("seconds_total", "counter", "Seconds spent searching.",
+         lambda s: [({}, s.seconds)]),
+        ("nodes_total", "counter", "Nodes visited, by ply from the root.",
+         lambda s: [({"ply": ply}, count) for ply, count in enumerate(s.nodes)]),
+        ("leaf_evaluations_total", "counter", "Nodes scored with the heuristic.",
+         lambda s: [({}, s.leaves)]),
+        ("beta_cutoffs_total", "counter", "Beta cutoffs, by the index of the move that caused them.",
+         lambda s: [({"move_index": i}, count) for i, count in enumerate(s.cutoff_index)]),
+        ("tt_probes_total", "counter", "Transposition table lookups.",
+         lambda s: [({}, s.tt_probes)]),
+        ("tt_hits_total", "counter", "Transposition table lookups that found the position.",
+         lambda s: [({}, s.tt_hits)]),
+        ("tt_cutoffs_total", "counter", "Nodes answered by a stored score.",
+         lambda s: [({}, s.tt_cutoffs)]),
+        ("iterations_total", "counter", "Iterative deepening iterations, by depth and whether they finished.",
+         lambda s: [({"depth": row["depth"], "result": result}, row[result])
+                    for row in s.iteration_rows() for result in ("completed", "aborted")]),
+        ("iteration_seconds_total", "counter", "Seconds spent in finished iterations, by depth.",
+         lambda s: [({"depth": row["depth"]}, row["seconds"]) for row in s.iteration_rows()]),
+        ("iteration_nodes_total", "counter", "Nodes visited in finished iterations, by depth.",
+         lambda s: [({"depth": row["depth"]}, row["nodes"]) for row in s.iteration_rows()]),
+        ("branching_factor", "gauge", "Effective branching factor, mean nodes of a depth over the depth before.",
+         lambda s: [({"depth": row["depth"]}, row["branching_factor"]) for row in s.iteration_rows()
+                    if row["branching_factor"] is not None]),
+        ("depth_reached_total", "counter", "Searches by the deepest iteration they finished.",
+         lambda s: [({"depth": depth}, count) for depth, count in sorted(s.depth_reached.items())]),
+    ]
+    lines = []
+    for name, kind, help_text, samples in families:
+        name = f"{prefix}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stats, labels in collectors:
+            for extra, value in samples(stats):
+                pairs = {**labels, **extra}
+                text = ",".join(f'{key}="{label}"' for key, label in pairs.items())
+                lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+    return lines
@@ -0,0 +1,394 @@
+# Headless tournament runner
+#
+# Plays any number of games between two agents without pygame, and reports wins,
+# losses, draws and how long each agent took per move. Run it with
+#
+#   python -m core.tournament long short --games 1000 --workers 32
+#
+# Player 1 always moves first. By default the two agents swap colours every game.
+# Games are spread over worker processes; every game gets its own seed derived from
+# --seed. Agents limited by depth or playouts (random, short, long or perfect with --depth,
+# mcts with --playouts) then play the same games whatever the number of workers, as long as
+# --time, which is then only an upper bound, lets every move reach that depth. Agents with a
+# time limit per move (long, perfect, mcts without --playouts) search as far as the time
+# allows, so their games depend on the speed of the machine and can differ from run to run.
+# --stats FILE saves what the one-process heuristic searches of the long term and perfect
+# agents did (see core.stats),
+# and --profile FILE samples where every move spends its time (see core.profiling).
+
+import os
+import sys
+import time
+
+from core.agents import AGENTS
+from core.bitboard import Position
+from core.profiling import INTERVAL, Profile, ProfiledAgent, collapsed_stacks, speedscope
+from core.stats import SearchStats, prometheus_lines
+
+
+def play_game(agents, seeds=(None, None)):
+    """
+    Function to play one game to the end.
+
+    Args:
+        agents (list): The agent playing player 1 and the agent playing player 2.
+        seeds (tuple): Seeds passed to the agents for this game.
+
+    Returns: A tuple (winner, times) where winner is 1, 2 or 0 for a draw, and times holds
+        the seconds each move took for player 1 and for player 2.
+    """
+    position = Position()
+    times = [[], []]
+    for agent, seed in zip(agents, seeds):
+        agent.new_game(seed)
+    who = 1  # Player 1 starts
+    while not position.is_full():
+        start_time = time.perf_counter()
+        coli = agents[who - 1].select_move(position, who)
+        times[who - 1].append(time.perf_counter() - start_time)
+        winning = position.is_winning_move(coli, who)
+        position.play(coli, who)
+        if winning:
+            return who, times
+        who = 3 - who
+    return 0, times
+
+
+class Scoreboard:
+    """
+    Results of the games between two agents, "a" and "b".
+    """
+
+    def __init__(self, names):
+        """
+        Args:
+            names (list): Names of agent a and agent b.
+        """
+        self.names = list(names)
+        self.games = 0
+        self.wins = [0, 0]  # games won by agent a and by agent b
+        self.draws = 0
+        self.times = [[], []]  # seconds per move of agent a and of agent b
+        self.stats = [None, None]  # SearchStats of agent a and of agent b, if they collect them
+        self.profiles = [None, None]  # Profile of the moves of agent a and of agent b, if they were profiled
+
+    def record(self, a_colour, winner, times):
+        """
+        Function to add the result of one game.
+
+        Args:
+            a_colour (int): The player number agent a had in the game (1 or 2).
+            winner (int): The player number that won, or 0 for a draw.
+            times (list): Seconds per move for player 1 and for player 2.
+        """
+        self.games += 1
+        if winner == 0:
+            self.draws += 1
+        else:
+            self.wins[0 if winner == a_colour else 1] += 1
+        self.times[0].extend(times[a_colour - 1])
+        self.times[1].extend(times[2 - a_colour])
+
+    def merge(self, other):
+        """
+        Function to add the results of another scoreboard for the same two agents.
+
+        Args:
+            other (Scoreboard): Results to add, for example from another worker process.
+        """
+        self.games += other.games
+        self.wins[0] += other.wins[0]
+        self.wins[1] += other.wins[1]
+        self.draws += other.draws
+        self.times[0].extend(other.times[0])
+        self.times[1].extend(other.times[1])
+        for i, stats in enumerate(other.stats):
+            if stats is not None:
+                if self.stats[i] is None:
+                    self.stats[i] = SearchStats()
+                self.stats[i].merge(stats)
+        for i, profile in enumerate(other.profiles):
+            if profile is not None:
+                if self.profiles[i] is None:
+                    self.profiles[i] = Profile()
+                self.profiles[i].merge(profile)
+
+    def stats_report(self, kind="json"):
+        """
+        Function to write the search statistics of both agents.
+
+        Args:
+            kind (str): "json" or "prometheus".
+
+        Returns: The text, with the agents' names as JSON keys or as the "agent" label.
+        """
+        collected = [(name, stats) for name, stats in zip(self.names, self.stats) if stats is not None]
+        if kind == "prometheus":
+            return "\n".join(prometheus_lines([(stats, {"agent": name}) for name, stats in collected])) + "\n"
+        import json  # only needed when the statistics are written
+        return json.dumps({name: stats.to_dict() for name, stats in collected}, indent=2)
+
+    def profile_report(self, kind="collapsed"):
+        """
+        Function to write the move profiles of both agents.
+
+        Args:
+            kind (str): "collapsed" or "speedscope".
+
+        Returns: The text, with the agents' names as the outermost frames or as the profile names.
+        """
+        profiles = [(name, profile) for name, profile in zip(self.names, self.profiles) if profile is not None]
+        if kind == "speedscope":
+            return speedscope(profiles)
+        return collapsed_stacks(profiles)
+
+    def summary(self):
+        """
+        Function to describe the results in a few lines of text.
+
+        Returns: The text of the report.
+        """
+        lines = [f"{self.games} games: {self.names[0]} won {self.wins[0]}, "
+                 f"{self.names[1]} won {self.wins[1]}, {self.draws} draws"]
+        for name, samples in zip(self.names, self.times):
+            lines.append(f"  {name}: {latency_summary(samples)}")
+        for name, profile in zip(self.names, self.profiles):
+            if profile is not None and profile.samples:
+                lines.append(f"  {name} spent its move time in (self, total):")
+                for frame, own, total in profile.top(8):
+                    lines.append(f"    {100 * own:5.1f}% {100 * total:5.1f}%  {frame}")
+        return "\n".join(lines)
+
+
+def percentile(samples, fraction):
+    """
+    Function to pick a percentile from a list of samples (nearest rank).
+
+    Args:
+        samples (list): The measured values.
+        fraction (float): Which percentile, between 0 and 1.
+
+    Returns: The value at that percentile, or 0 if there are no samples.
+    """
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(samples):
+    """
+    Function to describe move times.
+
+    Args:
+        samples (list): Seconds per move.
+
+    Returns: Text with the number of moves, mean, median, 99th percentile and maximum in milliseconds.
+    """
+    if not samples:
+        return "no moves"
+    mean = sum(samples) / len(samples)
+    return (f"{len(samples)} moves, mean {mean * 1000:.3f} ms, p50 {percentile(samples, 0.5) * 1000:.3f} ms, "
+            f"p99 {percentile(samples, 0.99) * 1000:.3f} ms, max {max(samples) * 1000:.3f} ms")
+
+
+def build_agent(spec):
+    """
+    Function to create an agent from its description.
+
+    Args:
+        spec (tuple): The agent's name (one of the names in AGENTS) and a dict of options for it.
+
+    Returns: The new agent.
+    """
+    name, options = spec
+    return AGENTS[name](**options)
+
+
+def game_seeds(seed, game):
+    """
+    Function to work out the seeds of the two agents for one game.
+
+    Args:
+        seed (int): Seed of the whole tournament.
+        game (int): Index of the game in the tournament.
+
+    Returns: Seeds for agent a and agent b.
+    """
+    base = (seed * 1000003 + game) * 2
+    return base, base + 1
+
+
+def play_games(spec_a, spec_b, games, seed, swap_colours, profile_interval=None):
+    """
+    Function to play some of the games of a tournament. Runs inside a worker process.
+
+    Args:
+        spec_a (tuple): Description of agent a, see build_agent.
+        spec_b (tuple): Description of agent b, see build_agent.
+        games (list): Indices of the games to play.
+        seed (int): Seed of the whole tournament.
+        swap_colours (bool): Let the agents take turns at playing first, otherwise agent a always starts.
+        profile_interval (float): Seconds between two stack samples of every move (see core.profiling),
+            or None to play without profiling.
+
+    Returns: A Scoreboard with the results of these games.
+    """
+    agent_a = build_agent(spec_a)
+    agent_b = build_agent(spec_b)
+    stats = [getattr(agent_a, "stats", None), getattr(agent_b, "stats", None)]
+    if profile_interval:
+        agent_a = ProfiledAgent(agent_a, profile_interval)
+        agent_b = ProfiledAgent(agent_b, profile_interval)
+    scoreboard = Scoreboard(agent_names(spec_a, spec_b))
+    for i in games:
+        seed_a, seed_b = game_seeds(seed, i)
+        if swap_colours and i % 2 == 1:
+            a_colour = 2
+            winner, times = play_game([agent_b, agent_a], (seed_b, seed_a))
+        else:
+            a_colour = 1
+            winner, times = play_game([agent_a, agent_b], (seed_a, seed_b))
+        scoreboard.record(a_colour, winner, times)
+    scoreboard.stats = stats
+    agent_a.close()
+    agent_b.close()
+    if profile_interval:
+        scoreboard.profiles = [agent_a.profile, agent_b.profile]
+    return scoreboard
+
+
+def time_limited(spec):
+    """
+    Function to check if an agent's moves depend on how fast it runs.
+
+    Args:
+        spec (tuple): Description of the agent, see build_agent.
+
+    Returns: True if the agent searches for a fixed time per move, False if it does the same work every time.
+        With max_depth the time limit is only an upper bound, so the work is fixed as long as every
+        move reaches that depth in time.
+    """
+    name, options = spec
+    if name == "mcts":
+        return options.get("playouts") is None
+    return "time_limit" in options and options.get("max_depth") is None
+
+
+def agent_names(spec_a, spec_b):
+    """
+    Function to name the two sides of a tournament.
+
+    Args:
+        spec_a (tuple): Description of agent a.
+        spec_b (tuple): Description of agent b.
+
+    Returns: The two names, with "-2" added to the second one if both agents are the same kind.
+    """
+    if spec_a[0] == spec_b[0]:
+        return [spec_a[0], spec_b[0] + "-2"]
+    return [spec_a[0], spec_b[0]]
+
+
+def run_tournament(spec_a, spec_b, games, swap_colours=True, seed=0, workers=1, profile_interval=None):
+    """
+    Function to play a series of games between two agents.
+
+    Args:
+        spec_a (tuple): Description of agent a, see build_agent.
+        spec_b (tuple): Description of agent b, see build_agent.
+        games (int): Number of games to play.
+        swap_colours (bool): Let the agents take turns at playing first, otherwise agent a always starts.
+        seed (int): Seed of the whole tournament; game i is always played with the same seeds.
+        workers (int): Number of worker processes, 1 plays every game in this process.
+        profile_interval (float): Seconds between two stack samples of every move, or None to play
+            without profiling.
+
+    Returns: A Scoreboard with the results.
+    """
+    workers = max(1, min(workers, games))
+    if workers == 1:
+        return play_games(spec_a, spec_b, range(games), seed, swap_colours, profile_interval)
+    from concurrent.futures import ProcessPoolExecutor  # imported here so that one-process runs start faster
+    scoreboard = Scoreboard(agent_names(spec_a, spec_b))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # every worker gets every workers-th game, so slow and fast games are spread evenly
+        futures = [pool.submit(play_games, spec_a, spec_b, range(w, games, workers), seed, swap_colours,
+                               profile_interval)
+                   for w in range(workers)]
+        for future in futures:
+            scoreboard.merge(future.result())
+    return scoreboard
+
+
+def agent_spec(name, args):
+    """
+    Function to describe an agent from the command line options.
+
+    Args:
+        name (str): One of the names in AGENTS.
+        args (argparse.Namespace): Parsed command line options.
+
+    Returns: The agent's description, see build_agent.
+    """
+    if name in ("long", "perfect"):
+        options = {"time_limit": args.time, "max_depth": args.depth, "workers": args.search_workers,
+                   "book": args.book, "cache": args.cache}
+        if getattr(args, "stats", None):
+            options["stats"] = True
+        return (name, options)
+    if name == "mcts":
+        return (name, {"time_limit": args.time, "playouts": args.playouts, "workers": args.search_workers})
+    return (name, {})
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+
+    parser = argparse.ArgumentParser(description="Play Connect 4 agents against each other without a display.")
+    parser.add_argument("agent_a", choices=sorted(AGENTS))
+    parser.add_argument("agent_b", choices=sorted(AGENTS))
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=None, help="seed the games are derived from (default 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per move for the long term, perfect and MCTS agents (with --depth only an upper bound)")
+    parser.add_argument("--depth", type=int, default=None, help="deepest search for the long term and perfect agents")
+    parser.add_argument("--search-workers", type=int, default=1,
+                        help="processes each long term or MCTS agent uses to search root moves in parallel")
+    parser.add_argument("--playouts", type=int, default=None, help="playouts per move for the MCTS agent")
+    parser.add_argument("--book", default=None, help="opening book for the long term and perfect agents")
+    parser.add_argument("--cache", default=None,
+                        help="position cache file the long term and perfect agents keep between runs")
+    parser.add_argument("--no-swap", action="store_true", help="agent a always plays first")
+    parser.add_argument("--stats", default=None,
+                        help="write statistics of the heuristic search of the long term and perfect agents to this "
+                             "file; exact solves and --search-workers above 1 are not counted")
+    parser.add_argument("--stats-format", choices=["json", "prometheus"], default="json",
+                        help="format of the --stats file")
+    parser.add_argument("--profile", default=None, help="sample the stack of every move and write the profile to this file")
+    parser.add_argument("--profile-format", choices=["collapsed", "speedscope"], default="collapsed",
+                        help="format of the --profile file: collapsed stacks for flame graphs, or speedscope JSON")
+    parser.add_argument("--profile-interval", type=float, default=INTERVAL * 1000,
+                        help="milliseconds between two stack samples")
+    args = parser.parse_args(argv)
+
+    specs = [agent_spec(args.agent_a, args), agent_spec(args.agent_b, args)]
+    if args.seed is not None:
+        for spec in specs:
+            if time_limited(spec):
+                print(f"warning: {spec[0]} thinks for a fixed time per move, so its games can differ between runs "
+                      f"with the same --seed", file=sys.stderr)
+    profile_interval = args.profile_interval / 1000 if args.profile else None
+    scoreboard = run_tournament(specs[0], specs[1], args.games, not args.no_swap,
+                                0 if args.seed is None else args.seed, args.workers, profile_interval)
+    print(scoreboard.summary())
+    if args.profile:
+        with open(args.profile, "w") as f:
+            f.write(scoreboard.profile_report(args.profile_format))
+    if args.stats:
+        with open(args.stats, "w") as f:
+            f.write(scoreboard.stats_report(args.stats_format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Transposition table for the minimax search
+#
+# The table is a pair of fixed size lists indexed by the low bits of the position hash.
+# One list only gives up an entry for a search that went at least as deep
+# (depth-preferred), the other always takes the newest entry (always-replace).
+
+# Bound types stored with each score
+EXACT = 0  # the score is the real minimax value
+LOWER = 1  # the real value is at least the score (the search failed high)
+UPPER = 2  # the real value is at most the score (the search failed low)
+
+POLICIES = ("two_tier", "depth", "always")  # replacement policies that can be chosen
+ENTRY_BYTES = 160  # rough size of one stored entry (tuple plus its integers) in bytes
+
+
+class TranspositionTable:
+    """
+    Bounded store of search results keyed by Zobrist hash.
+
+    Every entry is a tuple (key, depth, bound, score, move).
+    """
+
+    def __init__(self, max_mb=32, policy="two_tier"):
+        """
+        Args:
+            max_mb (float): Memory cap for the stored entries in megabytes.
+            policy (str): Replacement policy, one of "two_tier" (depth-preferred plus
+                always-replace buckets), "depth" or "always".
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"unknown replacement policy {policy!r}, expected one of {POLICIES}")
+        self.policy = policy
+        entries = max(1, int(max_mb * 1024 * 1024 // ENTRY_BYTES))
+        if policy == "two_tier":
+            entries //= 2  # the memory is shared by the two buckets
+        self.size = max(1, entries)
+        self.deep = [None] * self.size if policy != "always" else None
+        self.recent = [None] * self.size if policy != "depth" else None
+        self.probes = 0  # number of lookups
+        self.hits = 0  # number of lookups that found the position
+
+    def clear(self):
+        """
+        Function to remove every entry from the table.
+        """
+        if self.deep is not None:
+            self.deep = [None] * self.size
+        if self.recent is not None:
+            self.recent = [None] * self.size
+        self.probes = 0
+        self.hits = 0
+
+    def lookup(self, key):
+        """
+        Function to find the stored entry for a position.
+
+        Args:
+            key (int): Hash of the position.
+
+        Returns: The (key, depth, bound, score, move) tuple, or None if it is not stored.
+        """
+        self.probes += 1
+        slot = key % self.size
+        if self.deep is not None:
+            entry = self.deep[slot]
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        if self.recent is not None:
+            entry = self.recent[slot]
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        """
+        Function to save a search result.
+
+        Args:
+            key (int): Hash of the position.
+            depth (int): Depth the position was searched to.
+            bound (int): EXACT, LOWER or UPPER.
+            score (int): Score found by the search.
+            move (int): Best column found, or None.
+        """
+        entry = (key, depth, bound, score, move)
+        slot = key % self.size
+        if self.deep is not None:
+            old = self.deep[slot]
+            if old is None or old[0] == key or old[1] <= depth:
+                self.deep[slot] = entry
+                return
+        if self.recent is not None:
+            self.recent[slot] = entry
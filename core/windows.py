@@ -0,0 +1,40 @@
+# Precomputed tables of every group of 4 cells in a line
+#
+# The tables are built once at import for the board size in core.bitboard, so the
+# evaluation and the win checks only have to look windows up instead of working out
+# rows, columns and diagonals with nested loops on every call.
+
+from core.bitboard import COL_BITS, NUM_COLS, NUM_ROWS, bit_index
+
+
+def build_windows():
+    """
+    Function to list every group of 4 cells in a line.
+
+    Returns: List of windows (horizontal, vertical and both diagonals), each a tuple of 4 (row, column) pairs.
+    """
+    windows = []
+    steps = [(0, 1), (1, 0), (1, 1), (-1, 1)]  # row and column increments of each orientation
+    for rowinc, colinc in steps:
+        for r in range(NUM_ROWS):
+            for c in range(NUM_COLS):
+                cells = tuple((r + i * rowinc, c + i * colinc) for i in range(4))
+                if all(0 <= rowi < NUM_ROWS and 0 <= coli < NUM_COLS for rowi, coli in cells):
+                    windows.append(cells)
+    return windows
+
+
+WINDOWS = build_windows()  # 69 windows on a 6x7 board
+
+# Each window as a bit mask of its cells
+WINDOW_MASKS = [sum(1 << bit_index(rowi, coli) for rowi, coli in window) for window in WINDOWS]
+
+# Indices of the windows that contain each cell, looked up as CELL_WINDOWS[row][column]
+CELL_WINDOWS = [[[w for w, window in enumerate(WINDOWS) if (r, c) in window] for c in range(NUM_COLS)]
+                for r in range(NUM_ROWS)]
+
+# The same lists looked up by bit index instead of row and column
+BIT_WINDOWS = [[] for i in range(NUM_COLS * COL_BITS)]
+for r in range(NUM_ROWS):
+    for c in range(NUM_COLS):
+        BIT_WINDOWS[bit_index(r, c)] = CELL_WINDOWS[r][c]
@@ -0,0 +1,314 @@
+# Drawing and input handling shared by the pygame scripts
+#
+# The scripts keep the game itself in a core.bitboard.Position and let the agents in
+# core.agents choose the AI moves; this module only shows the board and reads the
+# human player's clicks and key presses. It is the only module that imports pygame, and
+# cli.py only imports it for the play command.
+
+import pygame
+import random
+import sys
+import time
+import pygame.locals
+from core.agents import AGENTS, BackgroundAgent
+from core.bitboard import COL_BITS, NUM_COLS, NUM_ROWS, Position
+
+WIDTH = 50    # Width of each cell
+# defining colour variables with RGB values
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+BLUE = (0, 0, 255)
+cols = [BLACK, RED, YELLOW]  # Colors for cells
+names = ["black", "red", "yellow"]  # Names for colours defined in the list cols
+num_keys = list(range(pygame.K_1, pygame.K_8))  # keys 1-7 choose a column
+FPS = 60  # frames per second while a game is shown
+SHOW_THINKING = True  # add "thinking..." to the window title while the AI searches
+
+
+# What the window shows, so that display_board only redraws the cells that changed
+sprites = []  # pre-rendered cell images (blue square with a black, red or yellow circle)
+shown_bits = None  # bitmaps of the pieces drawn on the screen, None if nothing is drawn yet
+clock = None  # limits the frame rate while an AI is thinking
+
+
+def open_window():
+    """
+    Function to start pygame and open the game window.
+
+    Returns: The screen (pygame.Surface) to draw on.
+    """
+    global sprites, shown_bits, clock
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH * NUM_COLS, WIDTH * NUM_ROWS))
+    pygame.display.set_caption("Connect Four")
+    sprites = []
+    for co in cols:
+        sprite = pygame.Surface((WIDTH, WIDTH)).convert()
+        sprite.fill(BLUE)
+        pygame.draw.circle(sprite, co, (WIDTH * 0.5, WIDTH * 0.5), 20)
+        sprites.append(sprite)
+    shown_bits = None
+    clock = pygame.time.Clock()
+    return screen
+
+
+def display_board(screen, position):
+    """
+    Function to display the game board on the screen. Only the cells that changed since
+    the last call are drawn and sent to the display, so calling it when nothing has
+    changed costs next to nothing.
+
+    Args:
+        screen (pygame.Surface): The screen to draw on.
+        position (Position): current state of the game board.
+    """
+    global shown_bits
+    bits = (position.bits[0], position.bits[1])
+    if bits == shown_bits:
+        return
+    if shown_bits is None:
+        cells = [(r, c) for r in range(NUM_ROWS) for c in range(NUM_COLS)]
+    else:
+        changed = (bits[0] ^ shown_bits[0]) | (bits[1] ^ shown_bits[1])
+        cells = []
+        while changed:
+            index = (changed & -changed).bit_length() - 1
+            changed &= changed - 1
+            cells.append((NUM_ROWS - 1 - index % COL_BITS, index // COL_BITS))
+    rects = [screen.blit(sprites[position.cell(r, c)], (c * WIDTH, r * WIDTH)) for r, c in cells]
+    pygame.display.update(rects)
+    shown_bits = bits
+
+
+def wait_for_events(busy=False):
+    """
+    Function to get the next events of the window. When nothing else needs the loop to
+    go round, it sleeps until an event arrives, so an idle window takes no CPU time.
+
+    Args:
+        busy (bool): True while something else (an AI thinking) needs the loop to keep
+            going; the events waiting are then returned at most FPS times a second.
+
+    Returns: List of pygame events, possibly empty when busy.
+    """
+    if busy:
+        clock.tick(FPS)
+        events = pygame.event.get()
+    else:
+        events = [pygame.event.wait()] + pygame.event.get()
+    for event in events:
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            pygame.display.update()  # the window was uncovered, show the whole screen again
+    return events
+
+
+def show_thinking(thinking):
+    """
+    Function to show in the window title whether the AI is thinking.
+
+    Args:
+        thinking (bool): True while the AI searches for its move.
+    """
+    if SHOW_THINKING:
+        caption = "Connect Four - thinking..." if thinking else "Connect Four"
+        if pygame.display.get_caption()[0] != caption:
+            pygame.display.set_caption(caption)
+
+
+def is_quit(event):
+    """
+    Function to check if the players wish to quit by pressing escape or the quit button.
+
+    Args:
+        event (pygame.event.Event): The event to check.
+
+    Returns: True if the game should end, False otherwise.
+    """
+    return event.type == pygame.locals.QUIT or event.type == pygame.KEYUP and event.key == pygame.K_ESCAPE
+
+
+def chosen_column(event):
+    """
+    Function to find the column a human player chose with a number key or the mouse.
+
+    Args:
+        event (pygame.event.Event): The event to check.
+
+    Returns: The column index, or -1 if the event is not a choice.
+    """
+    # Checking if players made a choice using number keys
+    if event.type == pygame.KEYDOWN and event.key in num_keys:
+        return num_keys.index(event.key)
+    # Checking if players made a choice using a mouse
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        return pygame.mouse.get_pos()[0] // WIDTH
+    return -1
+
+
+def quit_game():
+    """
+    Function to close the window and end the program.
+    """
+    pygame.quit()
+    sys.exit()
+
+
+def check_quit():
+    """
+    Function to handle the waiting events in games without a human player, so that the
+    window stays responsive and can be closed.
+    """
+    for event in pygame.event.get():
+        if is_quit(event):
+            quit_game()
+
+
+def print_board(position):
+    """
+    Function to print the board in the terminal, one row per line like the list boards.
+
+    Args:
+        position (Position): current state of the game board.
+    """
+    for row in position.to_board():
+        print(row)
+
+
+def start_turn(ais, position, who):
+    """
+    Function to get the AIs thinking at the start of a turn: the AI to move starts its
+    search, and while a human moves the other AI ponders its reply.
+
+    Args:
+        ais (list): BackgroundAgent of player 1 and player 2, None for a human player.
+        position (Position): current state of the game board.
+        who (int): The player to move (1 or 2).
+
+    Returns: The time the turn started (time.perf_counter).
+    """
+    if not position.is_full():
+        if ais[who - 1] is not None:
+            ais[who - 1].start(position)
+        elif ais[2 - who] is not None:
+            ais[2 - who].ponder(position)
+    return time.perf_counter()
+
+
+def play_game(players):
+    """
+    Function to play one game in the window. Humans choose columns with the mouse or the
+    number keys; agents think on a worker thread so that the window keeps responding.
+
+    Args:
+        players (list): For player 1 and player 2, an agent (see core.agents) or None for a human.
+            The agents are closed when the game ends, so they can only play one game.
+
+    Returns: A tuple (winner, position): the winning player's number or 0 for a draw, and the final board.
+    """
+    screen = open_window()
+    ais = [None if agent is None else BackgroundAgent(agent, who) for who, agent in enumerate(players, 1)]
+    position = Position()
+    who = 1  # Player 1 starts
+    winner = 0
+    start_time = start_turn(ais, position, who)
+
+    while winner == 0 and not position.is_full(): # while loop keeps iterating till there are no free columns left on the board
+        display_board(screen, position)
+        ai = ais[who - 1]
+        show_thinking(ai is not None and ai.thinking())
+
+        coli = -1
+        for event in wait_for_events(ai is not None): # waits for a human, or keeps going while an AI thinks
+            if is_quit(event):
+                for other in ais:
+                    if other is not None:
+                        other.close()  # also closes the agent
+                quit_game()
+            if ai is None and coli == -1:
+                coli = chosen_column(event)  # column chosen with a number key or the mouse, -1 if none
+        if ai is not None:
+            coli = ai.result()  # None until the AI has finished thinking
+            if coli is None:
+                coli = -1
+            else:
+                print("Time taken for move: ", time.perf_counter() - start_time, "seconds")
+
+        if coli != -1 and position.can_play(coli):
+            position.play(coli, who) # drops a player's piece into column 'coli'
+            if position.has_won(who): # checking if the player won
+                winner = who
+            else:
+                who = 3 - who  # Switch between players 1 and 2
+                start_time = start_turn(ais, position, who)
+
+    display_board(screen, position)
+    for ai in ais:
+        if ai is not None:
+            ai.close()  # also closes the agent
+    return winner, position
+
+
+def watch_games(agents, games, random_start=False):
+    """
+    Function to show games between two agents, one after the other.
+
+    Args:
+        agents (list): The agents playing as player 1 and player 2 (see core.agents).
+        games (int): Number of games to play.
+        random_start (bool): Let a random player start each game, otherwise player 1 always starts.
+
+    Returns: A tuple (scoreboard, times) with the number of wins of each player and the list
+        of seconds each player took per move.
+    """
+    scoreboard = [0, 0]  # score board to determine number of wins by each player
+    times = [[], []]  # seconds taken by each player for each of its moves
+    for i in range(games):
+        position = Position()  # Reinitialize the board
+        for agent in agents:
+            agent.new_game()
+        screen = open_window()
+
+        who = random.choice([1, 2]) if random_start else 1
+
+        while not position.is_full(): # while loop keeps iterating till there are no free columns left on the board
+            display_board(screen, position)
+            check_quit()
+
+            start_time = time.perf_counter()
+            coli = agents[who - 1].select_move(position, who)
+            position.play(coli, who)
+            won = position.has_won(who)  # checking if the player won
+            times[who - 1].append(time.perf_counter() - start_time)
+            if won:
+                scoreboard[who - 1] += 1
+                break
+
+            who = 3 - who
+
+        pygame.quit()
+    return scoreboard, times
+
+
+def main(argv=None):
+    import argparse  # only needed on the command line
+    from core.tournament import agent_spec, build_agent
+
+    parser = argparse.ArgumentParser(description="Play Connect 4 in a window.")
+    choices = ["human"] + sorted(AGENTS)
+    parser.add_argument("red", nargs="?", default="human", choices=choices, help="player 1, who moves first")
+    parser.add_argument("yellow", nargs="?", default="long", choices=choices, help="player 2")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per move for the searching agents")
+    parser.add_argument("--depth", type=int, default=None, help="deepest search for the long term agent")
+    parser.add_argument("--search-workers", type=int, default=1, help="processes searching each long term or MCTS move")
+    parser.add_argument("--playouts", type=int, default=None, help="playouts per move for the MCTS agent")
+    parser.add_argument("--book", default=None, help="opening book for the long term and perfect agents")
+    parser.add_argument("--cache", default=None, help="position cache file for the long term and perfect agents")
+    args = parser.parse_args(argv)
+
+    players = [None if name == "human" else build_agent(agent_spec(name, args)) for name in (args.red, args.yellow)]
+    winner, position = play_game(players)  # closes the agents
+    print(f"{names[winner]} has just won" if winner else "draw")
+    pygame.time.wait(2000)
+    print_board(position)
+    quit_game()
@@ -0,0 +1,38 @@
+# Random positions shared by the tests
+
+from core.bitboard import Position
+
+
+def random_position(rng, pieces):
+    """
+    Function to play random moves that do not win, so the game is still going afterwards.
+
+    Args:
+        rng (random.Random): Source of the moves.
+        pieces (int): Number of pieces to put on the board.
+
+    Returns: A tuple (position, who) with who the player to move.
+    """
+    while True:
+        position = Position()
+        who = 1
+        for _ in range(pieces):
+            moves = [col for col in position.valid_moves() if not position.is_winning_move(col, who)]
+            if not moves:
+                break  # every move wins, start again
+            position.play(rng.choice(moves), who)
+            who = 3 - who
+        else:
+            return position, who
+
+
+def mirror_position(position):
+    """
+    Function to build the mirror image of a position cell by cell from its list board.
+
+    Args:
+        position (Position): current state of the game board.
+
+    Returns: The position with every row reversed.
+    """
+    return Position.from_board([row[::-1] for row in position.to_board()])
@@ -0,0 +1,46 @@
+# Mirror images of positions and the table entries they share
+
+import math
+import random
+
+import pytest
+
+from core.bitboard import canonical_key, mirror_bits, mirror_move
+from core.search import Searcher
+from core.transposition import TranspositionTable
+from tests.positions import mirror_position, random_position
+
+POSITIONS = [random_position(random.Random(seed), seed % 25) for seed in range(50)]
+
+
+@pytest.mark.parametrize("position, who", POSITIONS)
+def test_mirror_bits_matches_reflected_board(position, who):
+    mirrored = mirror_position(position)
+    assert [mirror_bits(bits) for bits in position.bits] == mirrored.bits
+    assert mirror_bits(mirror_bits(position.bits[0])) == position.bits[0]
+    assert position.mirror_hash == mirrored.hash
+    assert mirrored.mirror_hash == position.hash
+
+
+@pytest.mark.parametrize("position, who", POSITIONS)
+def test_canonical_key_is_shared_with_mirror(position, who):
+    mirrored = mirror_position(position)
+    key = position.bits[who - 1] + (position.bits[0] | position.bits[1])
+    mirrored_key = mirrored.bits[who - 1] + (mirrored.bits[0] | mirrored.bits[1])
+    assert canonical_key(key)[0] == canonical_key(mirrored_key)[0]
+    assert position.canonical_hash()[0] == mirrored.canonical_hash()[0]
+    if key != mirrored_key:
+        assert canonical_key(key)[1] != canonical_key(mirrored_key)[1]
+
+
+@pytest.mark.parametrize("position, who", [(p, w) for p, w in POSITIONS if p.hash != p.mirror_hash][:20])
+def test_table_hit_through_mirror_returns_mirrored_move(position, who):
+    table = TranspositionTable(1)
+    maximizing = who == 2
+    column, score = Searcher(table).minimax(position, 3, -math.inf, math.inf, maximizing)
+
+    searcher = Searcher(table)
+    mirrored_column, mirrored_score = searcher.minimax(mirror_position(position), 3, -math.inf, math.inf, maximizing)
+    assert searcher.nodes == 1  # answered by the root entry of the first search
+    assert mirrored_column == mirror_move(column)
+    assert mirrored_score == score
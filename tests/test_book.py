@@ -0,0 +1,52 @@
+# Building a small opening book and reading it back through mmap
+
+import pytest
+
+from core.bitboard import Position, mirror_move
+from core.book import OpeningBook, book_positions, build_book, position_key, write_book
+from tests.positions import mirror_position
+
+PLIES = 2
+
+
+@pytest.fixture(scope="module")
+def book(tmp_path_factory):
+    entries = build_book(PLIES, node_limit=2000, time_limit=0.01)
+    path = str(tmp_path_factory.mktemp("book") / "book.bin")
+    write_book(path, entries)
+    book = OpeningBook(path)
+    yield book, entries
+    book.close()
+
+
+def test_every_position_is_found(book):
+    book, entries = book
+    positions = book_positions(PLIES)
+    assert len(book) == len(entries) == len(positions)
+    for position, who in positions:
+        key, mirrored = position_key(position, who)
+        column, score, exact = entries[key]
+        found = book.lookup(position, who)
+        assert found == (mirror_move(column) if mirrored else column, score, exact)
+        assert position.can_play(found[0])
+
+
+def test_mirror_image_gets_mirrored_column(book):
+    book, entries = book
+    asymmetric = 0
+    for position, who in book_positions(PLIES):
+        if position.hash == position.mirror_hash:
+            continue  # its own mirror image, the column and its mirror are equally good
+        asymmetric += 1
+        column, score, exact = book.lookup(position, who)
+        assert book.lookup(mirror_position(position), who) == (mirror_move(column), score, exact)
+    assert asymmetric > 0
+
+
+def test_unknown_position_is_not_found(book):
+    book, entries = book
+    position = Position()
+    for col, who in ((3, 1), (3, 2), (0, 1)):
+        position.play(col, who)
+    assert book.lookup(position, 2) is None
+    assert book.lookup(mirror_position(position), 2) is None
@@ -0,0 +1,119 @@
+# The memory-mapped position cache and the table tier in front of it
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from core.cache import HEADER, SLOT, PositionCache, TieredTable, pack_entry
+from core.transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+MAX_MB = 0.01  # 655 slots, enough for the tests and quick to create
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "positions.cache")
+
+
+def read_entries(path, keys):
+    """
+    Function to look keys up in a cache file. Runs inside another process.
+
+    Args:
+        path (str): Cache file.
+        keys (list): Keys to look up.
+
+    Returns: List with the entry found for every key, or None.
+    """
+    cache = PositionCache(path, readonly=True)
+    entries = [cache.lookup(key) for key in keys]
+    cache.close()
+    return entries
+
+
+def write_entry(path, entry):
+    """
+    Function to store one entry in a cache file. Runs inside another process.
+
+    Args:
+        path (str): Cache file.
+        entry (tuple): (key, depth, bound, score, move).
+    """
+    cache = PositionCache(path, MAX_MB)
+    cache.store(*entry)
+    cache.close()
+
+
+def test_store_lookup_round_trip(path):
+    cache = PositionCache(path, MAX_MB)
+    entries = [(0x1234567890ABCDEF, 7, EXACT, -1000000000, 3), (42, 1, LOWER, 17, None),
+               ((1 << 64) - 5, 12, UPPER, 0, 6)]
+    for entry in entries:
+        cache.store(*entry)
+    for entry in entries:
+        assert cache.lookup(entry[0]) == entry
+    assert cache.lookup(43) is None
+    cache.close()
+
+
+def test_deeper_entry_is_kept(path):
+    cache = PositionCache(path, MAX_MB)
+    cache.store(99, 8, EXACT, 5, 2)
+    cache.store(99, 3, EXACT, -5, 4)
+    assert cache.lookup(99) == (99, 8, EXACT, 5, 2)
+    cache.store(99, 9, LOWER, 6, 1)
+    assert cache.lookup(99) == (99, 9, LOWER, 6, 1)
+    cache.close()
+
+
+def test_colliding_slot_is_rejected(path):
+    cache = PositionCache(path, MAX_MB)
+    key = 1000
+    cache.store(key, 5, EXACT, 11, 3)
+    # another key of the same slot is a miss, not the stored entry
+    assert cache.lookup(key + cache.size) is None
+    # a slot whose check and data do not belong together, like one half written by another process
+    offset = HEADER.size + key % cache.size * SLOT.size
+    SLOT.pack_into(cache.data, offset, key ^ pack_entry(5, EXACT, 11, 3), pack_entry(6, EXACT, 11, 3))
+    assert cache.lookup(key) is None
+    cache.close()
+
+
+def test_other_process_sees_entries(path):
+    cache = PositionCache(path, MAX_MB)
+    cache.store(7, 4, EXACT, 3, 0)
+    cache.store(8, 5, UPPER, -2, 6)
+    cache.data.flush()
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(read_entries, path, [7, 8, 9]).result() == [(7, 4, EXACT, 3, 0), (8, 5, UPPER, -2, 6), None]
+        pool.submit(write_entry, path, (9, 6, LOWER, 1, 2)).result()
+    assert cache.lookup(9) == (9, 6, LOWER, 1, 2)  # written through the other process's mapping
+    cache.close()
+
+
+def test_file_is_created_once(path):
+    first = PositionCache(path, MAX_MB)
+    first.store(5, 4, EXACT, 1, 1)
+    second = PositionCache(path, MAX_MB * 4)  # an existing file keeps its size and entries
+    assert second.size == first.size
+    assert second.lookup(5) == (5, 4, EXACT, 1, 1)
+    first.close()
+    second.close()
+
+
+def test_tiered_table_uses_memory_tier(path):
+    cache = PositionCache(path, MAX_MB)
+    tiered = TieredTable(cache, TranspositionTable(1), min_depth=3)
+    tiered.store(11, 2, EXACT, 4, 1)  # too shallow for the file
+    tiered.store(12, 5, EXACT, 8, 2)
+    assert tiered.lookup(11) == (11, 2, EXACT, 4, 1)
+    assert cache.lookup(11) is None
+    assert cache.lookup(12) == (12, 5, EXACT, 8, 2)
+
+    # a fresh memory tier finds the deep entry in the file and keeps a copy
+    table = TranspositionTable(1)
+    fresh = TieredTable(cache, table, min_depth=3)
+    assert fresh.lookup(11) is None
+    assert fresh.lookup(12) == (12, 5, EXACT, 8, 2)
+    assert table.lookup(12) == (12, 5, EXACT, 8, 2)
+    cache.close()
@@ -0,0 +1,100 @@
+# Monte Carlo Tree Search: keeping the tree between moves, root-parallel trees and the agent
+
+import random
+
+import pytest
+
+from core.agents import MCTSAgent, RandomAgent
+from core.bitboard import Position
+from core.mcts import ParallelTrees, Tree
+from tests.positions import random_position
+
+
+def most_visited_child(tree, node):
+    """
+    Function to find the most visited child of a node that does not end the game.
+
+    Args:
+        tree (Tree): The search tree.
+        node (int): Number of an expanded node.
+
+    Returns: Number of the child.
+    """
+    children = [child for child in range(tree.first[node], tree.first[node] + tree.count[node])
+                if tree.terminal[child] is None]
+    return max(children, key=lambda child: tree.visits[child])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_advance_keeps_subtree(seed):
+    position, who = random_position(random.Random(seed), 2 * seed)
+    tree = Tree(position, who, seed)
+    tree.run(playouts=800, batch=32)
+    move = most_visited_child(tree, tree.root)
+    reply = most_visited_child(tree, move)
+    visits, first = tree.visits[reply], tree.first[reply]
+    after = position.copy()
+    after.play(tree.move[move], who)
+    after.play(tree.move[reply], 3 - who)
+
+    assert tree.advance(after, who)
+    assert tree.root == reply
+    assert tree.parent[reply] == -1
+    assert tree.visits[reply] == visits
+    assert tree.first[reply] == first
+    assert tree.advance(after, who)  # the same position again keeps the root
+    assert tree.root == reply
+
+
+def test_advance_to_unknown_position_starts_again():
+    position = Position()
+    tree = Tree(position, 1, 0)
+    tree.run(playouts=200, batch=32)
+    later = Position()
+    for col, who in ((0, 1), (6, 2), (0, 1), (6, 2)):
+        later.play(col, who)
+    assert not tree.advance(later, 1)
+    assert tree.size() == 1
+    assert tree.visits[tree.root] == 0
+
+
+@pytest.fixture(scope="module")
+def trees():
+    parallel = ParallelTrees(workers=2)
+    yield parallel
+    parallel.close()
+
+
+def test_parallel_trees_add_up_every_worker(trees):
+    position, who = random_position(random.Random(1), 6)
+    visits = trees.root_visits(position, who, seed=3, playouts=400, batch=20)
+    assert sorted(visits) == position.valid_moves()
+    assert sum(visits.values()) == 400  # 200 playouts in each of the two trees
+    assert visits == trees.root_visits(position, who, seed=3, playouts=400, batch=20)
+
+
+def test_parallel_trees_play_a_winning_move(trees):
+    position = Position()
+    for col, who in ((0, 1), (6, 2), (0, 1), (6, 2), (0, 1), (5, 2)):
+        position.play(col, who)
+    assert trees.best_move(position, 1, seed=0, playouts=100) == 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_agent_only_plays_legal_columns(workers):
+    agent = MCTSAgent(seed=0, playouts=60, batch=16, workers=workers)
+    opponent = RandomAgent(seed=0)
+    try:
+        for game in range(3 if workers == 1 else 1):
+            agent.new_game(game)
+            position, who = Position(), 1
+            players = [agent, opponent] if game % 2 == 0 else [opponent, agent]
+            while not position.is_full():
+                col = players[who - 1].select_move(position, who)
+                assert position.can_play(col)
+                position.play(col, who)
+                if position.has_won(who):
+                    break
+                who = 3 - who
+    finally:
+        agent.close()
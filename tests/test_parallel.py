@@ -0,0 +1,50 @@
+# Root-parallel minimax against the serial search
+
+import math
+import random
+import threading
+import time
+
+import pytest
+
+from core.ordering import StaticOrderer
+from core.parallel import ParallelSearcher
+from core.search import Searcher
+from tests.positions import random_position
+
+DEPTH = 4
+
+POSITIONS = [random_position(random.Random(seed), 4 + seed % 20) for seed in range(30)]
+
+
+@pytest.fixture(scope="module")
+def searcher():
+    with ParallelSearcher(workers=2) as parallel:
+        yield parallel
+
+
+@pytest.mark.parametrize("position, who", POSITIONS)
+def test_parallel_matches_serial(searcher, position, who):
+    maximizing = who == 2
+    serial = Searcher(orderer=StaticOrderer()).minimax(position, DEPTH, -math.inf, math.inf, maximizing)
+    assert searcher.minimax(position, DEPTH, maximizing) == serial
+
+
+def test_time_limit_is_kept(searcher):
+    position, who = POSITIONS[0]
+    start_time = time.perf_counter()
+    column, score, depth = searcher.iterative_deepening(position, time_limit=0.3, maximizingPlayer=who == 2)
+    assert position.can_play(column)
+    assert depth >= 1
+    assert time.perf_counter() - start_time < 1.5
+
+
+def test_stop_ends_search(searcher):
+    position, who = POSITIONS[0]
+    timer = threading.Timer(0.3, searcher.stop)
+    timer.start()
+    start_time = time.perf_counter()
+    column, score, depth = searcher.iterative_deepening(position, maximizingPlayer=who == 2)
+    timer.join()
+    assert position.can_play(column)
+    assert time.perf_counter() - start_time < 1.5
@@ -0,0 +1,110 @@
+# Alpha-beta with a transposition table, move ordering and incremental evaluation
+# against a plain minimax that tries every move and scores leaves from scratch
+
+import math
+import random
+
+import pytest
+
+from core.evaluate import Evaluator, score_pos
+from core.ordering import MoveOrderer, StaticOrderer
+from core.search import WIN_SCORE, Searcher
+from core.transposition import TranspositionTable
+from tests.positions import random_position
+
+DEPTH = 4
+
+POSITIONS = [random_position(random.Random(seed), seed % 30) for seed in range(40)]
+
+
+def reference_minimax(position, depth, maximizingPlayer):
+    """
+    Function to score a position with minimax without pruning, tables or ordering.
+
+    Args:
+        position (Position): current state of the game board.
+        depth (int): The depth of the search tree.
+        maximizingPlayer (bool): Indicates whether the current player is maximizing or minimizing.
+
+    Returns: The score, WIN_SCORE or -WIN_SCORE for a win of player 2 or 1.
+    """
+    if position.is_full():
+        return 0
+    if depth == 0:
+        return score_pos(position, 2)
+    who = 2 if maximizingPlayer else 1
+    scores = []
+    for col in position.valid_moves():
+        if position.is_winning_move(col, who):
+            scores.append(WIN_SCORE if maximizingPlayer else -WIN_SCORE)
+            continue
+        position.play(col, who)
+        scores.append(reference_minimax(position, depth - 1, not maximizingPlayer))
+        position.undo(col)
+    return max(scores) if maximizingPlayer else min(scores)
+
+
+def move_score(position, column, who):
+    """
+    Function to score a move with the reference minimax.
+
+    Args:
+        position (Position): current state of the game board.
+        column (int): The move to make.
+        who (int): The player making it.
+
+    Returns: The reference score of the position after the move, searched to DEPTH - 1.
+    """
+    if position.is_winning_move(column, who):
+        return WIN_SCORE if who == 2 else -WIN_SCORE
+    position.play(column, who)
+    score = reference_minimax(position, DEPTH - 1, who == 1)
+    position.undo(column)
+    return score
+
+
+@pytest.mark.parametrize("position, who", POSITIONS)
+def test_search_matches_reference(position, who):
+    maximizing = who == 2
+    expected = reference_minimax(position, DEPTH, maximizing)
+    searchers = [
+        Searcher(),
+        Searcher(TranspositionTable(1)),
+        Searcher(orderer=StaticOrderer()),
+        Searcher(TranspositionTable(1), orderer=MoveOrderer()),
+    ]
+    for searcher in searchers:
+        column, score = searcher.minimax(position, DEPTH, -math.inf, math.inf, maximizing)
+        assert score == expected
+        assert move_score(position, column, who) == expected  # the move really has that score
+
+
+@pytest.mark.parametrize("position, who", POSITIONS[:10])
+def test_iterative_deepening_matches_reference(position, who):
+    maximizing = who == 2
+    column, score, depth = Searcher(TranspositionTable(1), orderer=MoveOrderer()).iterative_deepening(
+        position, DEPTH, maximizing)
+    assert depth == DEPTH or abs(score) >= WIN_SCORE
+    assert score == reference_minimax(position, depth, maximizing)
+
+
+def test_evaluator_follows_moves():
+    rng = random.Random(0)
+    for game in range(20):
+        position, who = random_position(rng, rng.randrange(30))
+        evaluator = Evaluator(position)
+        played = []
+        for _ in range(8):
+            moves = position.valid_moves()
+            if not moves:
+                break
+            col = rng.choice(moves)
+            evaluator.play(position, col, who)
+            played.append((col, who))
+            who = 3 - who
+            assert evaluator.score(1) == score_pos(position, 1)
+            assert evaluator.score(2) == score_pos(position, 2)
+        for col, mover in reversed(played):
+            evaluator.undo(position, col, mover)
+            assert evaluator.score(1) == score_pos(position, 1)
+            assert evaluator.score(2) == score_pos(position, 2)
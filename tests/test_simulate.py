@@ -0,0 +1,68 @@
+# Batched NumPy playouts against the one-game-at-a-time playouts of core.mcts
+
+import random
+
+import pytest
+
+from core.bitboard import NUM_COLS, NUM_ROWS
+from core.mcts import python_playout
+from core import simulate
+from tests.positions import random_position
+
+np = pytest.importorskip("numpy")
+
+CELLS = NUM_ROWS * NUM_COLS
+GAMES = 3000
+
+
+def batched_playouts(position, who, games, seed):
+    """
+    Function to play many random games from one position with core.simulate.
+
+    Args:
+        position (Position): Position to start from.
+        who (int): The player to move (1 or 2).
+        games (int): Number of games.
+        seed (int): Seed for the random moves.
+
+    Returns: A tuple (result, plies) of arrays, see simulate.random_playouts.
+    """
+    mover = np.full(games, position.bits[who - 1], dtype=np.uint64)
+    other = np.full(games, position.bits[2 - who], dtype=np.uint64)
+    heights = np.tile(np.array(position.heights, dtype=np.int64), (games, 1))
+    return simulate.random_playouts(mover, other, heights, np.random.default_rng(seed))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_playouts_end_legally(seed):
+    position, who = random_position(random.Random(seed), 6 * seed)
+    heights = list(position.heights)
+    result, plies = batched_playouts(position, who, 500, seed)
+    empty = CELLS - position.count
+    assert set(result.tolist()) <= {-1, 0, 1}
+    assert ((plies >= 1) & (plies <= empty)).all()
+    # the player who made the last move won, and a game only ends undecided on a full board
+    assert (result[plies % 2 == 1] != -1).all()
+    assert (result[plies % 2 == 0] != 1).all()
+    assert (plies[result == 0] == empty).all()
+    assert position.heights == heights  # the inputs are not changed
+
+
+def test_empty_board_games():
+    winners, plies = simulate.simulate_random_games(2000, seed=1)
+    assert set(winners.tolist()) <= {0, 1, 2}
+    assert ((plies >= 7) & (plies <= CELLS)).all()  # the quickest win takes 7 moves
+    assert (winners[plies % 2 == 1] != 2).all()  # player 1 makes the odd moves
+    assert (winners[plies % 2 == 0] != 1).all()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_playouts_match_python_playouts(seed):
+    position, who = random_position(random.Random(seed), 4 + 8 * seed)
+    result = batched_playouts(position, who, GAMES, seed)[0]
+    rng = random.Random(seed)
+    scalar = [python_playout(position.copy(), who, rng) for i in range(GAMES)]
+    for outcome in (-1, 0, 1):
+        batched_share = float((result == outcome).mean())
+        scalar_share = scalar.count(outcome) / GAMES
+        assert abs(batched_share - scalar_share) < 0.05, outcome
@@ -0,0 +1,73 @@
+# The exact solver against a plain negamax that tries every move
+
+import random
+import time
+
+import pytest
+
+from core.agents import PerfectAgent
+from core.bitboard import Position
+from core.solver import CELLS, Solver, SolverAborted
+from tests.positions import random_position
+
+EMPTY = 10  # empty cells left in the endgames, small enough for the brute force
+
+
+def brute_force(position, who):
+    """
+    Function to score a position by searching every move to the end of the game.
+
+    Args:
+        position (Position): current state of the game board.
+        who (int): The player to move (1 or 2).
+
+    Returns: The score in the solver's convention (see core.solver).
+    """
+    if position.count == CELLS:
+        return 0
+    moves = position.valid_moves()
+    for col in moves:
+        if position.is_winning_move(col, who):
+            return (CELLS + 1 - position.count) // 2
+    best = -CELLS
+    for col in moves:
+        position.play(col, who)
+        best = max(best, -brute_force(position, 3 - who))
+        position.undo(col)
+    return best
+
+
+ENDGAMES = [random_position(random.Random(seed), CELLS - EMPTY) for seed in range(150)]
+
+
+@pytest.mark.parametrize("position, who", ENDGAMES)
+def test_solver_matches_brute_force(position, who):
+    assert Solver().solve_position(position, who) == brute_force(position, who)
+
+
+@pytest.mark.parametrize("position, who", ENDGAMES[:30])
+def test_analyse_scores_every_move(position, who):
+    scores = Solver().analyse(position, who)
+    assert sorted(scores) == position.valid_moves()
+    for col, score in scores.items():
+        if position.is_winning_move(col, who):
+            assert score == (CELLS + 1 - position.count) // 2
+        else:
+            position.play(col, who)
+            assert score == -brute_force(position, 3 - who)
+            position.undo(col)
+
+
+def test_time_limit_aborts_solve():
+    start_time = time.perf_counter()
+    with pytest.raises(SolverAborted):
+        Solver(time_limit=0.05).solve_position(Position(), 1)
+    assert time.perf_counter() - start_time < 1.0
+
+
+def test_perfect_agent_keeps_to_its_budget():
+    agent = PerfectAgent(time_limit=0.2)
+    start_time = time.perf_counter()
+    col = agent.select_move(Position(), 1)
+    assert col in range(7)
+    assert time.perf_counter() - start_time < 1.0